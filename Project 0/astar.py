@@ -1,80 +1,426 @@
 from pacman_module.game import Agent
 from pacman_module.pacman import Directions
-from pacman_module.util import PriorityQueue
+from collections import deque
+from searchproblem import FoodSearchProblem, PlanCache
 
-def key(state):
+def food_cells(food_bits):
     """
-    Returns a key that uniquely identifies a Pacman game state.
+    Returns the cells whose bit is set in `food_bits`.
     """
-    return (state.getPacmanPosition(), state.getFood(), tuple(state.getCapsules()))
+    cells = []
+    while food_bits:
+        # Visit the set bits of the food mask one by one
+        low_bit = food_bits & -food_bits
+        cells.append(low_bit.bit_length() - 1)
+        food_bits ^= low_bit
+    return tuple(cells)
 
-def heuristic(state):
+class FoodHeuristic:
     """
-    Returns the estimated cost from the current state to the goal.
+    Admissible and consistent estimate of the moves needed to eat all the
+    remaining food, based on true maze distances.
+
+    The estimate is the larger of
+    - the maze distance to the farthest food dot, and
+    - the maze distance to the nearest dot plus the weight of a minimum
+      spanning tree over the remaining dots.
+    The spanning tree only depends on the food set, so it is memoized per
+    food bitmask. `memo_size` bounds the memo (it is cleared when full) for
+    searches that must keep memory small.
     """
-    position = state.getPacmanPosition()
-    food_grid = state.getFood()
-    
-    if food_grid.count() == 0:
-        return 0
-
-    min_distance = float('inf')
-    for x in range(food_grid.width):
-        for y in range(food_grid.height):
-            if food_grid[x][y]:
-                distance = abs(position[0] - x) + abs(position[1] - y)
-                min_distance = min(min_distance, distance)
-    
-    return min_distance
+
+    def __init__(self, problem, memo_size=None):
+        self.distances = problem.maze_distances()
+        self.memo = {}
+        self.memo_size = memo_size
+
+    def __call__(self, key):
+        """
+        Returns the estimated cost from the current state to the goal.
+        """
+        cell, food_bits, _ = key
+
+        if food_bits == 0:
+            return 0
+
+        entry = self.memo.get(food_bits)
+        if entry is None:
+            cells = food_cells(food_bits)
+            entry = (cells, self.spanning_tree_weight(cells))
+            if self.memo_size is not None and len(self.memo) >= self.memo_size:
+                self.memo.clear()
+            self.memo[food_bits] = entry
+        cells, tree_weight = entry
+
+        from_pacman = self.distances[cell]
+        nearest = min(from_pacman[food] for food in cells)
+        farthest = max(from_pacman[food] for food in cells)
+
+        return max(farthest, nearest + tree_weight)
+
+    def spanning_tree_weight(self, cells):
+        """
+        Returns the weight of a minimum spanning tree over `cells` (Prim).
+        """
+        distances = self.distances
+        weight = 0
+        best = {food: distances[cells[0]][food] for food in cells[1:]}
+        while best:
+            food = min(best, key=best.get)
+            weight += best.pop(food)
+            row = distances[food]
+            for other in best:
+                if row[other] < best[other]:
+                    best[other] = row[other]
+        return weight
+
+class IndexedPriorityQueue:
+    """
+    Binary min-heap of integer item ids with decrease-key.
+
+    Each id is in the heap at most once, so the frontier never holds more
+    entries than there are distinct states. `position` maps an id to its
+    slot in the heap and `priority` to its current priority.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.position = {}
+        self.priority = {}
+
+    def __len__(self):
+        return len(self.heap)
+
+    def isEmpty(self):
+        return not self.heap
+
+    def push(self, item, priority):
+        """
+        Inserts `item`, or lowers its priority if it is already queued with
+        a higher one. Returns whether the queue changed.
+        """
+        index = self.position.get(item)
+        if index is None:
+            self.heap.append(item)
+            index = len(self.heap) - 1
+        elif priority >= self.priority[item]:
+            return False
+
+        self.priority[item] = priority
+        self._sift_up(index, item)
+        return True
+
+    def pop(self):
+        """
+        Removes the item with the lowest priority and returns it as a
+        `(priority, item)` tuple.
+        """
+        heap = self.heap
+        item = heap[0]
+        last = heap.pop()
+        if heap:
+            self._sift_down(0, last)
+        del self.position[item]
+        return self.priority.pop(item), item
+
+    def _sift_up(self, index, item):
+        heap, position, priority = self.heap, self.position, self.priority
+        item_priority = priority[item]
+        while index > 0:
+            parent_index = (index - 1) >> 1
+            parent = heap[parent_index]
+            if priority[parent] <= item_priority:
+                break
+            heap[index] = parent
+            position[parent] = index
+            index = parent_index
+        heap[index] = item
+        position[item] = index
+
+    def _sift_down(self, index, item):
+        heap, position, priority = self.heap, self.position, self.priority
+        size = len(heap)
+        item_priority = priority[item]
+        while True:
+            child_index = 2 * index + 1
+            if child_index >= size:
+                break
+            child = heap[child_index]
+            right_index = child_index + 1
+            if right_index < size and priority[heap[right_index]] < priority[child]:
+                child_index = right_index
+                child = heap[right_index]
+            if item_priority <= priority[child]:
+                break
+            heap[index] = child
+            position[child] = index
+            index = child_index
+        heap[index] = item
+        position[item] = index
+
+# Search modes selectable with the `search` agent argument
+SEARCH_MODES = ('astar', 'idastar', 'bidirectional')
+
+# Heuristic memo bound used by the memory-bounded IDA* mode
+IDASTAR_MEMO_SIZE = 4096
 
 class PacmanAgent(Agent):
+    # Plans shared by every game played in this process
+    plan_cache = PlanCache()
+    # Search counters, set by tools.instrumentation when switched on
+    stats = None
+
     def __init__(self, args):
-        self.moves = []
+        self.moves = deque()
+        self.mode = getattr(args, 'search', None) or 'astar'
+        if self.mode not in SEARCH_MODES:
+            raise ValueError("Unknown search mode '{}', expected one of {}".format(
+                self.mode, ', '.join(SEARCH_MODES)))
+
+        # Number of nodes expanded by the last search
+        self.expanded = 0
+        # Largest number of search nodes held in memory by the last search
+        self.peak_nodes = 0
+
+    def reset(self, state):
+        """
+        Forgets the plans of the previous game so the agent can be reused
+        for a new game starting from `state`. The shared plan cache is
+        cleared too, so the game searches as a fresh agent would.
+        """
+        self.moves = deque()
+        self.plan_cache.clear()
 
     def get_action(self, state):
-        if not self.moves:
-            self.moves = self.astar(state)
+        # Replan when the plan ran out or its next move is no longer legal
+        if not self.moves or self.moves[0] not in state.getLegalPacmanActions():
+            self.moves = deque(self.plan(state))
 
         try:
-            return self.moves.pop(0)
+            return self.moves.popleft()
 
         except IndexError:
             return Directions.STOP
 
-    def astar(self, state):
-        # fringe stores tuples of (priority, item)
-        fringe = PriorityQueue()
-        
-        # We push a tuple of (state, path) as the item.
-        fringe.push((state, []), 0)  
+    def plan(self, state):
+        """
+        Returns the actions that eat all the food from `state`, reusing a
+        cached plan when this state lies on one found for the same layout.
+        """
+        problem = FoodSearchProblem(state)
+        actions = self.plan_cache.lookup(problem)
+        stats = self.stats
+        if actions is None:
+            actions = getattr(self, self.mode)(state, problem)
+            self.plan_cache.store(problem, actions)
+            if stats is not None:
+                stats.expanded += self.expanded
+                stats.peak_frontier = max(stats.peak_frontier, self.peak_nodes)
+        elif stats is not None:
+            stats.cache_hits += 1
+        return actions
 
-        # closed set stores visited states to avoid cycles
-        closed = set()
+    def astar(self, state, problem=None):
+        # The game state is only read once to build the search problem
+        if problem is None:
+            problem = FoodSearchProblem(state)
+        heuristic = FoodHeuristic(problem)
+        self.expanded = 0
+        self.peak_nodes = 0
+
+        # Every distinct state gets a compact integer id. The parallel
+        # lists below are indexed by id: key, best known g, parent id and
+        # the action taken from the parent.
+        ids = {problem.start: 0}
+        keys = [problem.start]
+        best_g = [0]
+        parents = [-1]
+        actions = [None]
+
+        # Priorities are (f, -g, id): ties on f go to the deeper node
+        fringe = IndexedPriorityQueue()
+        fringe.push(0, (heuristic(problem.start), 0, 0))
 
         while not fringe.isEmpty():
-            # Pop returns the item with the lowest priority.
-            # It seems your PriorityQueue.pop() returns a tuple of (priority, item)
-            # so we'll unpack it correctly here.
-            priority, current_item = fringe.pop()
-            current_state, path = current_item
-
-            current_key = key(current_state)
-            if current_key in closed:
-                continue
-            
-            closed.add(current_key)
-
-            if current_state.isWin():
+            _, current = fringe.pop()
+            current_key = keys[current]
+            self.expanded += 1
+
+            if problem.is_goal(current_key):
+                self.peak_nodes = len(keys)
+                path = []
+                while parents[current] != -1:
+                    path.append(actions[current])
+                    current = parents[current]
+                path.reverse()
                 return path
-            
-            for next_state, action in current_state.generatePacmanSuccessors():
-                g_cost = len(path) + 1
-                h_cost = heuristic(next_state)
-                f_cost = g_cost + h_cost
-                
-                new_path = path + [action]
-                
-                # Push the new state and path with the calculated f_cost as priority
-                fringe.push((next_state, new_path), f_cost)
-        
-        return [] # failure
\ No newline at end of file
+
+            g_cost = best_g[current] + 1
+            for next_key, action in problem.successors(current_key):
+                next_id = ids.get(next_key)
+                if next_id is None:
+                    next_id = len(keys)
+                    ids[next_key] = next_id
+                    keys.append(next_key)
+                    best_g.append(g_cost)
+                    parents.append(current)
+                    actions.append(action)
+                elif g_cost < best_g[next_id]:
+                    best_g[next_id] = g_cost
+                    parents[next_id] = current
+                    actions[next_id] = action
+                else:
+                    # Not better than a path already found
+                    continue
+
+                f_cost = g_cost + heuristic(next_key)
+                fringe.push(next_id, (f_cost, -g_cost, next_id))
+
+        self.peak_nodes = len(keys)
+        return [] # failure
+
+    def idastar(self, state, problem=None):
+        """
+        Iterative-deepening A* with the same heuristic as `astar`.
+
+        Each iteration is a depth-first search bounded by f = g + h. Only
+        the current path is kept in memory, so memory grows linearly with
+        the solution depth instead of with the number of states.
+        """
+        if problem is None:
+            problem = FoodSearchProblem(state)
+        heuristic = FoodHeuristic(problem, memo_size=IDASTAR_MEMO_SIZE)
+        self.expanded = 0
+        self.peak_nodes = 0
+
+        start = problem.start
+        if problem.is_goal(start):
+            return []
+
+        bound = heuristic(start)
+        while True:
+            next_bound = float('inf')
+            path_keys = [start]
+            on_path = {start}
+            actions = []
+            # One successor iterator per node on the current path
+            stack = [problem.successors(start)]
+            self.expanded += 1
+
+            while stack:
+                for next_key, action in stack[-1]:
+                    if next_key in on_path:
+                        continue
+
+                    f_cost = len(actions) + 1 + heuristic(next_key)
+                    if f_cost > bound:
+                        next_bound = min(next_bound, f_cost)
+                        continue
+
+                    if problem.is_goal(next_key):
+                        return actions + [action]
+
+                    path_keys.append(next_key)
+                    on_path.add(next_key)
+                    actions.append(action)
+                    stack.append(problem.successors(next_key))
+                    self.expanded += 1
+                    self.peak_nodes = max(self.peak_nodes, len(stack))
+                    break
+                else:
+                    # All successors of the deepest node have been tried
+                    stack.pop()
+                    if actions:
+                        actions.pop()
+                        on_path.discard(path_keys.pop())
+
+            if next_bound == float('inf'):
+                return [] # failure
+            bound = next_bound
+
+    def bidirectional(self, state, problem=None):
+        """
+        Meet-in-the-middle breadth-first search for layouts with a single
+        food dot. Alternates full layers from Pacman and from the dot over
+        maze cells until the two frontiers meet.
+
+        With more than one dot left the goal is not a single cell, so this
+        falls back to `astar`.
+        """
+        if problem is None:
+            problem = FoodSearchProblem(state)
+        self.expanded = 0
+        self.peak_nodes = 0
+
+        start_cell, food_bits, _ = problem.start
+        if food_bits == 0:
+            return []
+        if food_bits & (food_bits - 1):
+            return self.astar(state, problem)
+        goal_cell = food_bits.bit_length() - 1
+
+        # cell -> (previous cell, action, depth) in each search tree
+        forward = {start_cell: (None, None, 0)}
+        backward = {goal_cell: (None, None, 0)}
+        forward_layer = [start_cell]
+        backward_layer = [goal_cell]
+        meeting = None
+
+        while forward_layer and backward_layer and meeting is None:
+            # Expand the smaller frontier by one full layer
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting = self._expand_layer(
+                    problem, forward_layer, forward, backward, False)
+            else:
+                backward_layer, meeting = self._expand_layer(
+                    problem, backward_layer, backward, forward, True)
+            self.peak_nodes = max(self.peak_nodes, len(forward) + len(backward))
+
+        if meeting is None:
+            return [] # failure
+
+        path = []
+        cell = meeting
+        while cell != start_cell:
+            cell, action, _ = forward[cell]
+            path.append(action)
+        path.reverse()
+        cell = meeting
+        while cell != goal_cell:
+            cell, action, _ = backward[cell]
+            path.append(action)
+        return path
+
+    def _expand_layer(self, problem, layer, tree, other_tree, reverse):
+        """
+        Expands every cell of `layer` once. Returns the next layer and the
+        meeting cell with the shortest total path, if the searches met.
+
+        In the forward tree `action` moves from the previous cell to the
+        cell. In the backward tree (`reverse`) it moves from the cell to
+        the previous one, i.e. towards the dot.
+        """
+        next_layer = []
+        for cell in layer:
+            self.expanded += 1
+            depth = tree[cell][2] + 1
+            for action, next_cell in problem.neighbors[cell]:
+                if next_cell in tree:
+                    continue
+                if reverse:
+                    # Action that moves from `next_cell` back onto `cell`
+                    action = next(move for move, target in problem.neighbors[next_cell]
+                                  if target == cell)
+                tree[next_cell] = (cell, action, depth)
+                next_layer.append(next_cell)
+
+        # Keep the meeting cell with the shortest path through it
+        meeting = None
+        best_length = float('inf')
+        for cell in next_layer:
+            if cell in other_tree:
+                length = tree[cell][2] + other_tree[cell][2]
+                if length < best_length:
+                    best_length = length
+                    meeting = cell
+        return next_layer, meeting
@@ -1,45 +1,114 @@
 from pacman_module.game import Agent
 from pacman_module.pacman import Directions
 from collections import deque  # Import deque
+from searchproblem import FoodSearchProblem, PlanCache
 
-def key(state):
+class SearchNode:
     """
-    Returns a key that uniquely identifies a Pacman game state.
+    A node of the search tree. Each node only remembers its parent and the
+    action that led to it, so the path is rebuilt once at the goal instead
+    of being copied at every expansion.
     """
-    return (state.getPacmanPosition(), state.getFood(), tuple(state.getCapsules()))
+    __slots__ = ('key', 'parent', 'action')
+
+    def __init__(self, key, parent=None, action=None):
+        self.key = key
+        self.parent = parent
+        self.action = action
+
+    def path(self):
+        """
+        Returns the list of actions from the root to this node.
+        """
+        actions = []
+        node = self
+        while node.parent is not None:
+            actions.append(node.action)
+            node = node.parent
+        actions.reverse()
+        return actions
 
 class PacmanAgent(Agent):
+    # Plans shared by every game played in this process
+    plan_cache = PlanCache()
+    # Search counters, set by tools.instrumentation when switched on
+    stats = None
+
     def __init__(self, args):
-        self.moves = []
+        self.moves = deque()
+        # Number of nodes expanded by the last search
+        self.expanded = 0
+        # Largest number of search nodes held in memory by the last search
+        self.peak_nodes = 0
+
+    def reset(self, state):
+        """
+        Forgets the plans of the previous game so the agent can be reused
+        for a new game starting from `state`. The shared plan cache is
+        cleared too, so the game searches as a fresh agent would.
+        """
+        self.moves = deque()
+        self.plan_cache.clear()
 
     def get_action(self, state):
-        if not self.moves:
-            self.moves = self.bfs(state)
+        # Replan when the plan ran out or its next move is no longer legal
+        if not self.moves or self.moves[0] not in state.getLegalPacmanActions():
+            self.moves = deque(self.plan(state))
 
         try:
-            return self.moves.pop(0)
+            return self.moves.popleft()
 
         except IndexError:
             return Directions.STOP
 
-    def bfs(self, state):
-        fringe = deque([(state, [])])  # Use deque and an empty path list
-        closed = set()
+    def plan(self, state):
+        """
+        Returns the actions that eat all the food from `state`, reusing a
+        cached plan when this state lies on one found for the same layout.
+        """
+        problem = FoodSearchProblem(state)
+        actions = self.plan_cache.lookup(problem)
+        stats = self.stats
+        if actions is None:
+            actions = self.bfs(state, problem)
+            self.plan_cache.store(problem, actions)
+            if stats is not None:
+                stats.expanded += self.expanded
+                stats.peak_frontier = max(stats.peak_frontier, self.peak_nodes)
+        elif stats is not None:
+            stats.cache_hits += 1
+        return actions
+
+    def bfs(self, state, problem=None):
+        # The game state is only read once to build the search problem
+        if problem is None:
+            problem = FoodSearchProblem(state)
+        self.expanded = 0
+        self.peak_nodes = 0
+        if problem.is_goal(problem.start):
+            return []
+
+        root = SearchNode(problem.start)
+        fringe = deque([root])  # Use deque of search nodes
+        closed = {root.key}
 
         while fringe:  # Loop until fringe is empty
-            current_state, path = fringe.popleft() # Use popleft() to get the first element (FIFO)
+            node = fringe.popleft() # Use popleft() to get the first element (FIFO)
+            self.expanded += 1
 
-            if current_state.isWin():
-                return path
+            for next_key, action in problem.successors(node.key):
+                # Goal and closed-set checks happen when a node is generated
+                if next_key in closed:
+                    continue
+                closed.add(next_key)
 
-            current_key = key(current_state)
+                child = SearchNode(next_key, node, action)
+                if problem.is_goal(next_key):
+                    self.peak_nodes = len(closed)
+                    return child.path()
 
-            if current_key not in closed:
-                closed.add(current_key)
+                # Add new nodes to the right end of the deque
+                fringe.append(child)
 
-                for next_state, action in current_state.generatePacmanSuccessors():
-                    # Add new states to the right end of the deque
-                    new_path = path + [action]
-                    fringe.append((next_state, new_path))
-        
-        return []  # Return empty list if no solution is found
\ No newline at end of file
+        self.peak_nodes = len(closed)
+        return []  # Return empty list if no solution is found
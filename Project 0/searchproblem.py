@@ -0,0 +1,200 @@
+from array import array
+from collections import OrderedDict, deque
+from pacman_module.game import Actions
+from pacman_module.pacman import Directions
+
+# Order in which moves are generated from a cell
+ACTIONS = (Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST)
+
+# Distance stored for cells that cannot be reached
+UNREACHABLE = 0xFFFF
+
+# All-pairs maze distances, computed once per layout
+_distance_tables = {}
+
+class FoodSearchProblem:
+    """
+    Food-collection search problem built once from an initial game state.
+
+    Cells are numbered `x * height + y`. Walls, food and capsules are int
+    bitmasks with one bit per cell, and each open cell has a precomputed
+    list of `(action, next_cell)` moves. A search state is the tuple
+    `(cell, food_bits, capsule_bits)`, so the planners never need to copy
+    a `GameState` while searching.
+    """
+
+    def __init__(self, state):
+        walls = state.getWalls()
+        self.width = walls.width
+        self.height = walls.height
+
+        self.wall_bits = 0
+        for x in range(self.width):
+            for y in range(self.height):
+                if walls[x][y]:
+                    self.wall_bits |= 1 << self.cell((x, y))
+
+        # Precomputed moves for every open cell
+        self.neighbors = [()] * (self.width * self.height)
+        for x in range(self.width):
+            for y in range(self.height):
+                if walls[x][y]:
+                    continue
+                moves = []
+                for action in ACTIONS:
+                    dx, dy = Actions.directionToVector(action)
+                    nx, ny = int(x + dx), int(y + dy)
+                    if 0 <= nx < self.width and 0 <= ny < self.height \
+                            and not walls[nx][ny]:
+                        moves.append((action, self.cell((nx, ny))))
+                self.neighbors[self.cell((x, y))] = tuple(moves)
+
+        food_bits = 0
+        for position in state.getFood().asList():
+            food_bits |= 1 << self.cell(position)
+
+        capsule_bits = 0
+        for position in state.getCapsules():
+            capsule_bits |= 1 << self.cell(position)
+
+        self.start = (self.cell(state.getPacmanPosition()), food_bits, capsule_bits)
+
+        # Identifies the maze independently of food and Pacman
+        self.layout_key = (self.width, self.height, self.wall_bits)
+
+    def cell(self, position):
+        """
+        Returns the cell index of an `(x, y)` position.
+        """
+        x, y = position
+        return int(x) * self.height + int(y)
+
+    def position(self, cell):
+        """
+        Returns the `(x, y)` position of a cell index.
+        """
+        return divmod(cell, self.height)
+
+    def maze_distances(self):
+        """
+        Returns the table of true maze distances between all cells.
+
+        `table[a][b]` is the number of moves from cell `a` to cell `b`, or
+        `UNREACHABLE`. The table is built by a BFS from every open cell the
+        first time a layout is seen and shared by every later problem on
+        the same walls.
+        """
+        table = _distance_tables.get(self.layout_key)
+        if table is None:
+            table = [self._distances_from(cell) for cell in range(self.width * self.height)]
+            _distance_tables[self.layout_key] = table
+        return table
+
+    def _distances_from(self, source):
+        """
+        Returns the maze distances from `source` to every cell.
+        """
+        distances = array('H', [UNREACHABLE]) * (self.width * self.height)
+        if (self.wall_bits >> source) & 1:
+            return distances
+
+        distances[source] = 0
+        fringe = deque([source])
+        while fringe:
+            cell = fringe.popleft()
+            next_distance = distances[cell] + 1
+            for _, next_cell in self.neighbors[cell]:
+                if distances[next_cell] == UNREACHABLE:
+                    distances[next_cell] = next_distance
+                    fringe.append(next_cell)
+        return distances
+
+    def is_goal(self, key):
+        """
+        Returns whether all the food has been eaten in state `key`.
+        """
+        return key[1] == 0
+
+    def successors(self, key):
+        """
+        Yields `(next_key, action)` pairs for every legal move from `key`.
+        Pacman eats the food and capsule of the cell it moves onto.
+        """
+        cell, food_bits, capsule_bits = key
+        for action, next_cell in self.neighbors[cell]:
+            bit = 1 << next_cell
+            yield (next_cell, food_bits & ~bit, capsule_bits & ~bit), action
+
+    def path_keys(self, key, actions):
+        """
+        Returns the keys visited when playing `actions` from `key`,
+        starting with `key` itself.
+        """
+        keys = [key]
+        for action in actions:
+            cell = key[0]
+            for move, next_cell in self.neighbors[cell]:
+                if move == action:
+                    break
+            else:
+                raise ValueError("Illegal action {} from cell {}".format(action, cell))
+            bit = 1 << next_cell
+            key = (next_cell, key[1] & ~bit, key[2] & ~bit)
+            keys.append(key)
+        return keys
+
+class PlanCache:
+    """
+    Least-recently-used store of optimal plans keyed by (layout, start
+    state), shared by every agent in the process. Agents clear it in
+    `reset`, so a game never reuses plans found in an earlier game.
+
+    Every state along a stored plan is indexed as well. Since any suffix
+    of an optimal plan is itself optimal, an agent that has to replan from
+    a state on an old path gets the rest of that path without searching.
+    """
+
+    def __init__(self, max_plans=128):
+        self.max_plans = max_plans
+        self.plans = OrderedDict()
+        self.index = {}
+
+    def clear(self):
+        """
+        Forgets every plan.
+        """
+        self.plans.clear()
+        self.index.clear()
+
+    def lookup(self, problem):
+        """
+        Returns the cached actions from the start of `problem`, or None.
+        """
+        entry = self.index.get((problem.layout_key, problem.start))
+        if entry is None:
+            return None
+
+        plan_key, offset = entry
+        self.plans.move_to_end(plan_key)
+        actions, _ = self.plans[plan_key]
+        return actions[offset:]
+
+    def store(self, problem, actions):
+        """
+        Caches `actions` as the plan from the start of `problem`.
+        """
+        plan_key = (problem.layout_key, problem.start)
+        keys = problem.path_keys(problem.start, actions)
+        self.plans[plan_key] = (tuple(actions), keys)
+        self.plans.move_to_end(plan_key)
+
+        for offset, key in enumerate(keys):
+            self.index[(problem.layout_key, key)] = (plan_key, offset)
+
+        while len(self.plans) > self.max_plans:
+            old_plan_key, (_, old_keys) = self.plans.popitem(last=False)
+            layout_key = old_plan_key[0]
+            for key in old_keys:
+                entry = self.index.get((layout_key, key))
+                if entry is not None and entry[0] == old_plan_key:
+                    del self.index[(layout_key, key)]
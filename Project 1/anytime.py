@@ -0,0 +1,51 @@
+# anytime.py
+
+import time
+
+# ความลึกสูงสุดของ iterative deepening เพื่อให้ลูปจบเสมอ
+MAX_DEPTH = 64
+
+
+class SearchTimeout(Exception):
+    """
+    ถูก raise เมื่อการค้นหาใช้เวลาเกินงบที่กำหนด
+    """
+
+
+class Deadline:
+    """
+    เวลาสิ้นสุดของการค้นหาหนึ่งครั้ง (งบเวลาเป็นมิลลิวินาที)
+    """
+    __slots__ = ('end',)
+
+    def __init__(self, budget_ms):
+        self.end = time.perf_counter() + budget_ms / 1000.0
+
+    def expired(self):
+        return time.perf_counter() >= self.end
+
+    def check(self):
+        """
+        raise SearchTimeout ถ้าหมดเวลาแล้ว
+        """
+        if time.perf_counter() >= self.end:
+            raise SearchTimeout()
+
+
+def iterative_deepening(search, budget_ms, max_depth=MAX_DEPTH):
+    """
+    เรียก search(depth, deadline) ที่ความลึก 1, 2, 3, ... จนกว่าจะหมดเวลา
+    แล้วคืน action จากความลึกสุดท้ายที่ค้นหาเสร็จ
+
+    ความลึก 1 จะค้นหาโดยไม่มี deadline เสมอ เพื่อให้มี action คืนไปแน่นอน
+    """
+    deadline = Deadline(budget_ms)
+    best_action = search(1, None)
+    for depth in range(2, max_depth + 1):
+        if deadline.expired():
+            break
+        try:
+            best_action = search(depth, deadline)
+        except SearchTimeout:
+            break
+    return best_action
@@ -0,0 +1,223 @@
+# evaluation.py
+
+from collections import deque
+import numpy as np
+
+# ชื่อ feature ตามลำดับใน vector
+FEATURES = ('score', 'food_distance', 'ghost_danger', 'scared_ghost', 'scared_time', 'capsules')
+DEFAULT_WEIGHTS = (1.0, -1.5, -20.0, 10.0, 0.5, -20.0)
+
+# ตาราง maze distance ของแต่ละ layout (คำนวณครั้งเดียวต่อ layout)
+_distance_tables = {}
+
+
+def maze_distances(walls):
+    """
+    คืนตาราง numpy ขนาด [cells, cells] ของระยะทางจริงในเขาวงกต ระหว่างทุกช่อง
+    (ช่อง (x, y) มี index x * height + y) คำนวณด้วย BFS จากทุกช่องที่ไม่ใช่กำแพง
+    """
+    key = (walls.width, walls.height, tuple(tuple(column) for column in walls.data))
+    table = _distance_tables.get(key)
+    if table is not None:
+        return table
+
+    width, height = walls.width, walls.height
+    cells = width * height
+    # ช่องที่ไปไม่ถึงให้มีระยะเท่ากับจำนวนช่องทั้งหมด (มากกว่าทุกระยะจริง)
+    table = np.full((cells, cells), cells, dtype=np.int32)
+
+    neighbors = [[] for _ in range(cells)]
+    for x in range(width):
+        for y in range(height):
+            if walls[x][y]:
+                continue
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if 0 <= nx < width and 0 <= ny < height and not walls[nx][ny]:
+                    neighbors[x * height + y].append(nx * height + ny)
+
+    for source in range(cells):
+        x, y = divmod(source, height)
+        if walls[x][y]:
+            continue
+        row = table[source]
+        row[source] = 0
+        fringe = deque([source])
+        while fringe:
+            cell = fringe.popleft()
+            for next_cell in neighbors[cell]:
+                if row[next_cell] == cells:
+                    row[next_cell] = row[cell] + 1
+                    fringe.append(next_cell)
+
+    _distance_tables[key] = table
+    return table
+
+
+class EvalFeatures:
+    """
+    ข้อมูลของ state ที่ใช้คำนวณ feature ซึ่งอัปเดตจาก parent ไป child ได้
+    โดยไม่ต้องอ่าน food grid ใหม่
+    """
+    __slots__ = ('pacman', 'ghosts', 'scared', 'food', 'food_distance', 'capsules', 'score')
+
+    def __init__(self, pacman, ghosts, scared, food, food_distance, capsules, score):
+        self.pacman = pacman
+        self.ghosts = ghosts
+        self.scared = scared
+        self.food = food
+        self.food_distance = food_distance
+        self.capsules = capsules
+        self.score = score
+
+
+class FeatureEvaluator:
+    """
+    Evaluation function แบบ linear combination ของ feature ใช้แทน
+    score_evaluation_function ได้โดยตรง: PacmanAgent(eval_fn=FeatureEvaluator())
+
+    ระยะทางทั้งหมดอ่านจากตาราง maze distance ที่คำนวณไว้ล่วงหน้า และ agent
+    ใน hminimax.py จะส่ง EvalFeatures จาก parent ไป child ผ่าน child_features
+    ทำให้ต้นทุนของแต่ละ leaf แทบไม่ขึ้นกับขนาดของ layout หรือจำนวน feature
+    """
+
+    def __init__(self, weights=DEFAULT_WEIGHTS, batch_threshold=3):
+        self.weights = np.asarray(weights, dtype=float)
+        self.weight_list = [float(weight) for weight in weights]
+        # จำนวนลูกขั้นต่ำที่จะประเมินพร้อมกันด้วย numpy (ผีมี action ไม่เกิน 3-4 ตัว
+        # ค่าที่มากกว่า 4 จึงทำให้ไม่มีการประเมินพร้อมกันเลย)
+        self.batch_threshold = batch_threshold
+        self.walls = None
+        self.height = None
+        self.distances = None
+        self.closeness = None
+
+    @property
+    def score_additive(self):
+        # feature อื่นขึ้นกับข้อมูลที่ถูก hash เท่านั้น จึงขึ้นกับน้ำหนักของ score
+        return self.weight_list[0] == 1.0
+
+    def __call__(self, state):
+        return self.value(self.features(state))
+
+    def __getstate__(self):
+        # ตารางของ layout คำนวณใหม่ได้ใน process ปลายทาง ไม่ต้องส่งไปกับ agent_kwargs
+        # (parallel.py เทียบการตั้งค่าของ agent จาก bytes ที่ pickle แล้ว)
+        state = self.__dict__.copy()
+        state.update(walls=None, height=None, distances=None, closeness=None)
+        return state
+
+    def _prepare(self, state):
+        walls = state.getWalls()
+        if walls is not self.walls:
+            self.walls = walls
+            self.height = walls.height
+            self.distances = maze_distances(walls)
+            # 1 / (1 + ระยะทาง) ของทุกคู่ช่อง สำหรับ values
+            self.closeness = 1.0 / (1 + self.distances)
+
+    def cell(self, position):
+        # ตำแหน่งของผีอาจเป็นทศนิยมตอนที่ผีกลัว (เดินช้าลง)
+        x, y = position
+        return int(x + 0.5) * self.height + int(y + 0.5)
+
+    def _food_distance(self, pacman, food):
+        if len(food) == 0:
+            return 0
+        return int(self.distances[pacman, food].min())
+
+    def features(self, state):
+        """
+        คำนวณ EvalFeatures ของ state ตั้งแต่ต้น
+        """
+        self._prepare(state)
+        pacman = self.cell(state.getPacmanPosition())
+        food = np.array([self.cell(position) for position in state.getFood().asList()],
+                        dtype=np.intp)
+        num_agents = state.getNumAgents()
+        return EvalFeatures(
+            pacman,
+            tuple(self.cell(position) for position in state.getGhostPositions()),
+            tuple(state.getGhostState(i).scaredTimer for i in range(1, num_agents)),
+            food,
+            self._food_distance(pacman, food),
+            len(state.getCapsules()),
+            state.getScore())
+
+    def child_features(self, parent, parent_state, child_state, agent_index):
+        """
+        อัปเดต EvalFeatures ของ parent หลังจาก agent_index เดิน
+        """
+        if agent_index == 0:
+            pacman = self.cell(child_state.getPacmanPosition())
+            food = parent.food
+            x, y = child_state.getPacmanPosition()
+            if parent_state.hasFood(x, y):
+                food = food[food != pacman]
+            food_distance = self._food_distance(pacman, food)
+            num_agents = child_state.getNumAgents()
+            # Pacman อาจกินแคปซูล (ผีกลัว) หรือกินผี (ผีกลับจุดเกิด)
+            return EvalFeatures(
+                pacman,
+                tuple(self.cell(position) for position in child_state.getGhostPositions()),
+                tuple(child_state.getGhostState(i).scaredTimer for i in range(1, num_agents)),
+                food, food_distance,
+                len(child_state.getCapsules()),
+                child_state.getScore())
+
+        ghosts = list(parent.ghosts)
+        scared = list(parent.scared)
+        ghosts[agent_index - 1] = self.cell(child_state.getGhostPosition(agent_index))
+        scared[agent_index - 1] = child_state.getGhostState(agent_index).scaredTimer
+        return EvalFeatures(parent.pacman, tuple(ghosts), tuple(scared), parent.food,
+                            parent.food_distance, parent.capsules, child_state.getScore())
+
+    def vector(self, features):
+        """
+        คืน feature vector ตามลำดับใน FEATURES
+        """
+        from_pacman = self.distances[features.pacman]
+        danger = 0.0
+        scared_ghost = 0.0
+        for ghost, timer in zip(features.ghosts, features.scared):
+            closeness = 1.0 / (1 + int(from_pacman[ghost]))
+            if timer > 0:
+                scared_ghost += closeness
+            else:
+                danger += closeness
+        return (features.score, features.food_distance, danger, scared_ghost,
+                sum(features.scared), features.capsules)
+
+    def value(self, features):
+        return sum(weight * x for weight, x in zip(self.weight_list, self.vector(features)))
+
+    def values(self, features_list):
+        """
+        ประเมินหลาย state พร้อมกันด้วย numpy (คืน array ของค่า)
+
+        feature ถูกบวกตามลำดับเดียวกับ vector และ value ผลลัพธ์จึงเท่ากับ
+        value ของแต่ละ state ทุกบิต การเลือก action จึงไม่ขึ้นกับ batch_threshold
+        """
+        ghosts = len(features_list[0].ghosts)
+        rows = np.array([(features.score, features.food_distance, features.capsules,
+                          features.pacman) + features.ghosts + features.scared
+                         for features in features_list], dtype=float)
+        cells = rows[:, 3:4 + ghosts].astype(np.intp)
+        closeness = self.closeness[cells[:, :1], cells[:, 1:]]
+        timers = rows[:, 4 + ghosts:]
+        scared = timers > 0
+        danger_terms = np.where(scared, 0.0, closeness)
+        scared_terms = np.where(scared, closeness, 0.0)
+
+        danger = np.zeros(len(rows))
+        scared_ghost = np.zeros(len(rows))
+        scared_time = np.zeros(len(rows))
+        for ghost in range(ghosts):
+            danger += danger_terms[:, ghost]
+            scared_ghost += scared_terms[:, ghost]
+            scared_time += timers[:, ghost]
+
+        columns = (rows[:, 0], rows[:, 1], danger, scared_ghost, scared_time, rows[:, 2])
+        total = np.zeros(len(rows))
+        for weight, column in zip(self.weight_list, columns):
+            total += weight * column
+        return total
@@ -0,0 +1,91 @@
+# expectimax.py
+
+from pacman_module.pacman import GameState
+import hminimax
+from hminimax import score_evaluation_function
+
+class PacmanAgent(hminimax.PacmanAgent):
+    """
+    Agent ที่ใช้อัลกอริทึม Expectimax สำหรับผีที่เดินแบบสุ่ม
+
+    ใช้โครงสร้างเดียวกับ hminimax.PacmanAgent (Transposition Table,
+    iterative deepening, parallel) แต่ตาของผีเป็น chance node ที่ผีเลือก
+    action ที่ทำได้ด้วยความน่าจะเป็นเท่ากัน ค่าของ chance node ถูกเก็บใน
+    Transposition Table ตาม (hash ของ state, ความลึกที่เหลือ)
+
+    ถ้ากำหนด value_bounds = (lower, upper) ของ evaluation function จะตัด
+    chance node แบบ Star1 (*-minimax) ได้ ขอบเขตนี้ต้องครอบคลุมค่าทุกค่า
+    ที่ evaluation function คืนได้จริง ไม่เช่นนั้นผลลัพธ์อาจผิด
+    """
+
+    def __init__(self, depth='2', eval_fn=score_evaluation_function, tt_size='65536',
+                 time_budget=None, workers='0', value_bounds=None, ghost_radius=None):
+        super().__init__(depth, eval_fn, tt_size, time_budget, workers, ghost_radius)
+        if value_bounds is None:
+            self.lower, self.upper = -float('inf'), float('inf')
+        else:
+            if isinstance(value_bounds, str):
+                value_bounds = value_bounds.split(',')
+            self.lower, self.upper = (float(bound) for bound in value_bounds)
+
+    def agent_kwargs(self):
+        kwargs = super().agent_kwargs()
+        kwargs['value_bounds'] = (self.lower, self.upper)
+        return kwargs
+
+    def min_value(self, state: GameState, ply, agent_index, alpha, beta, state_hash=None,
+                  tt_action=None, features=None):
+        """
+        คำนวณค่าคาดหวังของ chance node (ตาของผี)
+        """
+        successors = state.generateGhostSuccessors(agent_index)
+        if not successors:
+            return self.leaf_value(state, features), None
+
+        stats = self.stats
+        if stats is not None:
+            stats.expanded += 1
+            stats.generated += len(successors)
+
+        next_ply = ply + 1
+        lower, upper = self.lower, self.upper
+        count = len(successors)
+        total = 0.0
+        remaining = count
+
+        leaf_values = None
+        if next_ply == self.horizon:
+            leaf_values = self.batch_leaf_values(state, successors, agent_index, features)
+
+        for successor_state, action in self.ordered_successors(successors, tt_action, ply):
+            remaining -= 1
+            # หน้าต่างของลูกตัวนี้: ถ้าค่าของลูกตกนอกช่วงนี้ ค่าของ chance node
+            # จะตกนอก (alpha, beta) แน่นอน แม้ลูกที่เหลือจะได้ค่า upper/lower
+            if remaining:
+                child_alpha = max(lower, count * alpha - total - remaining * upper)
+                child_beta = min(upper, count * beta - total - remaining * lower)
+            else:
+                child_alpha = max(lower, count * alpha - total)
+                child_beta = min(upper, count * beta - total)
+
+            if leaf_values is not None:
+                val = leaf_values[action]
+            else:
+                val, _ = self.child_value(state, successor_state, agent_index, next_ply,
+                                          child_alpha, child_beta, state_hash, features)
+            total += val
+
+            # Star1 pruning: ขอบเขตบน/ล่างของค่าคาดหวังหลุดจาก (alpha, beta) แล้ว
+            if remaining:
+                upper_bound = (total + remaining * upper) / count
+                if upper_bound < alpha:
+                    if stats is not None:
+                        stats.cutoffs += 1
+                    return upper_bound, None
+                lower_bound = (total + remaining * lower) / count
+                if lower_bound > beta:
+                    if stats is not None:
+                        stats.cutoffs += 1
+                    return lower_bound, None
+
+        return total / count, None
@@ -1,91 +1,74 @@
 # hminimax.py
 
-from pacman_module.game import Agent
 from pacman_module.pacman import GameState
+from transposition import ZobristHasher, TranspositionTable
+from searchcore import SearchAgent
 
 def score_evaluation_function(current_game_state: GameState):
     return current_game_state.getScore()
 
-class PacmanAgent(Agent):
+# evaluation function ที่เท่ากับ score บวกค่าที่ขึ้นกับตำแหน่ง อาหาร แคปซูล และ
+# สถานะของผีเท่านั้น กำหนด score_additive = True ได้ Transposition Table จึงใช้ค่า
+# ข้าม state ที่ score ต่างกันได้ (ดู SearchAgent.score_relative)
+score_evaluation_function.score_additive = True
+
+class PacmanAgent(SearchAgent):
     """
     Agent ที่ใช้อัลกอริทึม H-Minimax (Minimax with Alpha-Beta Pruning)
+    พร้อม Transposition Table และการจัดลำดับ move (TT move, killer moves)
+
+    การค้นหาอยู่ใน searchcore.SearchAgent
     """
 
-    def __init__(self, depth='2', eval_fn=score_evaluation_function):
-        super().__init__()
-        self.depth = int(depth)
-        self.evaluation_function = eval_fn
+    pruning = True
 
-    def get_action(self, game_state: GameState):
-        """
-        คืนค่า Action ที่ดีที่สุดโดยใช้ Alpha-Beta Pruning
-        """
-        alpha = -float('inf')
-        beta = float('inf')
-        # เริ่มต้นค้นหาจาก Pacman (agent 0)
-        _, best_action = self.get_value(game_state, 0, 0, alpha, beta)
-        return best_action
+    def __init__(self, depth='2', eval_fn=score_evaluation_function, tt_size='65536',
+                 time_budget=None, workers='0', ghost_radius=None):
+        super().__init__(depth, time_budget, workers, ghost_radius)
+        self.evaluation_function = eval_fn
+        self.score_relative = getattr(eval_fn, 'score_additive', False)
+        # evaluation function ที่อัปเดต feature จาก parent ไป child ได้
+        # (เช่น evaluation.FeatureEvaluator) จะได้รับ feature ส่งต่อลงไปในต้นไม้
+        self.incremental = hasattr(eval_fn, 'child_features')
+        self.hasher = ZobristHasher()
+        # ตารางถูกเก็บไว้ข้ามการเรียก get_action เพื่อใช้ผลการค้นหาเดิมซ้ำ
+        self.table = TranspositionTable(int(tt_size))
 
-    def get_value(self, state: GameState, current_depth, agent_index, alpha, beta):
+    def root_features(self, state: GameState):
         """
-        ฟังก์ชัน Alpha-Beta แบบ Recursive หลัก
+        feature ของราก ถ้า evaluation function รองรับการอัปเดตแบบ incremental
         """
-        num_agents = state.getNumAgents()
-        
-        # Base Case: ถ้าเกมจบ หรือถึงความลึกสูงสุด
-        if state.isWin() or state.isLose() or current_depth == self.depth:
-            return self.evaluation_function(state), None
-
-        # ถ้าเป็นตาของ Pacman (Maximizer)
-        if agent_index == 0:
-            return self.max_value(state, current_depth, agent_index, alpha, beta)
-        # ถ้าเป็นตาของผี (Minimizer)
-        else:
-            return self.min_value(state, current_depth, agent_index, alpha, beta)
-
-    def max_value(self, state: GameState, current_depth, agent_index, alpha, beta):
-        max_val = -float('inf')
-        best_action = None
-        
-        successors = state.generatePacmanSuccessors()
-        if not successors:
-            return self.evaluation_function(state), None
+        if not self.incremental:
+            return None
+        return self.evaluation_function.features(state)
 
-        next_agent_index = 1
+    def child_features(self, features, state: GameState, successor_state: GameState, agent_index):
+        if features is None:
+            return None
+        return self.evaluation_function.child_features(features, state, successor_state,
+                                                       agent_index)
 
-        for successor_state, action in successors:
-            val, _ = self.get_value(successor_state, current_depth, next_agent_index, alpha, beta)
-            if val > max_val:
-                max_val = val
-                best_action = action
-            
-            if max_val > beta:
-                return max_val, best_action # Pruning
-            
-            alpha = max(alpha, max_val)
-            
-        return max_val, best_action
+    def leaf_value(self, state: GameState, features):
+        if features is None:
+            return self.evaluation_function(state)
+        return self.evaluation_function.value(features)
 
-    def min_value(self, state: GameState, current_depth, agent_index, alpha, beta):
-        min_val = float('inf')
-        
-        successors = state.generateGhostSuccessors(agent_index)
-        if not successors:
-            return self.evaluation_function(state), None
-
-        num_agents = state.getNumAgents()
-        next_agent_index = (agent_index + 1) % num_agents
-        next_depth = current_depth
-        if next_agent_index == 0:
-            next_depth += 1
-
-        for successor_state, action in successors:
-            val, _ = self.get_value(successor_state, next_depth, next_agent_index, alpha, beta)
-            min_val = min(min_val, val)
-
-            if min_val < alpha:
-                return min_val, None # Pruning
-            
-            beta = min(beta, min_val)
+    def batch_leaf_values(self, state: GameState, successors, agent_index, features):
+        """
+        ถ้าลูกทุกตัวเป็น leaf และมีจำนวนมากพอ ประเมินทั้งหมดพร้อมกันด้วย numpy
+        คืน dict ของ action -> ค่า หรือ None
+        """
+        if features is None or len(successors) < self.evaluation_function.batch_threshold:
+            return None
+        children = [self.child_features(features, state, successor_state, agent_index)
+                    for successor_state, _ in successors]
+        values = self.evaluation_function.values(children)
+        return {action: float(value) for (_, action), value in zip(successors, values)}
 
-        return min_val, None
\ No newline at end of file
+    def agent_kwargs(self):
+        """
+        argument สำหรับสร้าง agent แบบเดียวกันใน worker process
+        """
+        kwargs = super().agent_kwargs()
+        kwargs.update(eval_fn=self.evaluation_function, tt_size=str(self.table.size))
+        return kwargs
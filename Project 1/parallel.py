@@ -0,0 +1,117 @@
+# parallel.py
+
+import itertools
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Value
+
+# process pool ที่สร้างไว้แล้ว หนึ่ง pool ต่อชนิดของ agent และจำนวน worker ใช้ซ้ำข้าม
+# ทุก move และทุก agent ชนิดเดียวกัน (การตั้งค่าของ agent ส่งไปพร้อมงานแต่ละชิ้น)
+_pools = {}
+
+# เลขของการค้นหาที่ราก ส่งไปพร้อมลูกแต่ละตัวเพื่อให้ worker รู้ว่าเริ่มการค้นหาใหม่
+_search_ids = itertools.count()
+
+# ตัวแปรในแต่ละ worker process
+_worker_agent = None
+_worker_settings = None
+_worker_search = None
+_shared_alpha = None
+
+
+def _init_worker(shared_alpha):
+    global _shared_alpha
+    _shared_alpha = shared_alpha
+
+
+def _use_settings(settings):
+    """
+    สร้าง agent ของ worker ใหม่เมื่อการตั้งค่าต่างจากงานก่อนหน้า ถ้าเหมือนเดิม
+    จะใช้ agent ตัวเดิมซ้ำข้าม move
+    """
+    global _worker_agent, _worker_settings, _worker_search
+    if settings != _worker_settings:
+        agent_class, agent_kwargs = pickle.loads(settings)
+        _worker_agent = agent_class(**agent_kwargs)
+        _worker_settings = settings
+        _worker_search = None
+
+
+def _search_root_child(payload):
+    """
+    ค้นหา subtree ของลูกหนึ่งตัวของราก โดยเริ่มจาก alpha ที่ดีที่สุดที่ worker
+    ทุกตัวหาได้ขณะนั้น คืน (value, alpha ที่ใช้)
+    """
+    global _worker_search
+    settings, child_state, search_id, context = pickle.loads(payload)
+    _use_settings(settings)
+    # TT ของ worker มีประวัติต่างจากของ agent ที่ราก จึงล้างทุกครั้งที่เริ่มการค้นหา
+    # ใหม่ ลูกของรากเดียวกันที่ worker นี้ได้รับยังใช้ตารางร่วมกันได้
+    if search_id != _worker_search:
+        _worker_search = search_id
+        table = getattr(_worker_agent, 'table', None)
+        if table is not None:
+            table.clear()
+    alpha = _shared_alpha.value
+    value = _worker_agent.root_child_value(child_state, alpha, context)
+
+    # value >= alpha เป็นค่าจริงของลูก จึงใช้เป็น alpha ร่วมได้
+    if value >= alpha:
+        with _shared_alpha.get_lock():
+            if value > _shared_alpha.value:
+                _shared_alpha.value = value
+    return value, alpha
+
+
+def _get_pool(agent_class, workers):
+    key = (agent_class, workers)
+    pool = _pools.get(key)
+    if pool is None:
+        shared_alpha = Value('d', -float('inf'))
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(shared_alpha,))
+        pool = (executor, shared_alpha)
+        _pools[key] = pool
+    return pool
+
+
+def parallel_root_search(agent_class, agent_kwargs, workers, state, young_brothers_wait=False,
+                         context=None):
+    """
+    กระจาย action ของ Pacman ที่รากไปค้นหาใน process pool แล้วคืน action ที่ดีที่สุด
+
+    ผลลัพธ์เหมือนการค้นหาแบบ serial ทุกประการ: ลูกที่ได้ค่าต่ำกว่า alpha ที่ใช้
+    มีค่าจริงต่ำกว่าค่าที่ดีที่สุดแน่นอน ส่วนลูกที่เหลือได้ค่าจริง จึงเลือก action
+    แรกตามลำดับ successor ที่ให้ค่าสูงสุดได้เหมือนกัน
+
+    ถ้า young_brothers_wait เป็นจริง จะค้นหาลูกตัวแรกให้เสร็จก่อน เพื่อให้ได้
+    alpha สำหรับลูกตัวอื่น (ใช้กับ Alpha-Beta)
+
+    context คือข้อมูลที่คำนวณครั้งเดียวที่ราก (เช่น schedule ของ agent) ซึ่งถูกส่ง
+    ให้ root_child_value ของ worker พร้อมลูกทุกตัว
+    """
+    executor, shared_alpha = _get_pool(agent_class, workers)
+    successors = state.generatePacmanSuccessors()
+    if not successors:
+        return None
+
+    shared_alpha.value = -float('inf')
+    search_id = next(_search_ids)
+    settings = pickle.dumps((agent_class, agent_kwargs), pickle.HIGHEST_PROTOCOL)
+    payloads = [pickle.dumps((settings, child_state, search_id, context),
+                             pickle.HIGHEST_PROTOCOL)
+                for child_state, _ in successors]
+
+    results = []
+    if young_brothers_wait:
+        results.append(executor.submit(_search_root_child, payloads[0]).result())
+        payloads = payloads[1:]
+    results.extend(executor.map(_search_root_child, payloads))
+
+    best_value = -float('inf')
+    best_action = None
+    for (value, alpha), (_, action) in zip(results, successors):
+        if value >= alpha and value > best_value:
+            best_value = value
+            best_action = action
+    return best_action
@@ -0,0 +1,424 @@
+# searchcore.py
+
+from pacman_module.game import Agent
+from pacman_module.game import Actions
+from pacman_module.pacman import GameState
+from transposition import EXACT, LOWER, UPPER
+from anytime import iterative_deepening
+from parallel import parallel_root_search
+
+# agent ใน schedule ที่แทนผีที่อยู่ไกลทุกตัว ซึ่งเดินพร้อมกันเป็นชั้นเดียวแบบไม่แตกกิ่ง
+MERGED = -1
+
+
+def manhattan_distance(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+
+def ply_schedule(state: GameState, ghost_radius=None):
+    """
+    ลำดับของ agent ในหนึ่งรอบของการค้นหา คำนวณครั้งเดียวต่อ get_action
+
+    ถ้ากำหนด ghost_radius ผีที่อยู่ห่างจาก Pacman (Manhattan) เกินระยะนี้ที่ราก
+    จะไม่ได้ตาของตัวเอง แต่ถูกรวมเป็นชั้น MERGED ชั้นเดียวท้ายรอบ
+
+    Return:
+    -------
+    - (schedule, far_ghosts) เช่น ((0, 1, 2), ()) หรือ ((0, 1, MERGED), (2, 3))
+    """
+    ghosts = range(1, state.getNumAgents())
+    if ghost_radius is None:
+        return (0,) + tuple(ghosts), ()
+
+    pacman = state.getPacmanPosition()
+    near, far = [], []
+    for ghost in ghosts:
+        if manhattan_distance(state.getGhostPosition(ghost), pacman) > ghost_radius:
+            far.append(ghost)
+        else:
+            near.append(ghost)
+    return (0,) + tuple(near) + ((MERGED,) if far else ()), tuple(far)
+
+
+class SearchAgent(Agent):
+    """
+    แกนกลางของการค้นหาแบบ depth-limited Minimax ที่ minimax.py, hminimax.py
+    และ expectimax.py ใช้ร่วมกัน
+
+    node ถูกระบุด้วย ply (จำนวนตาที่เดินมาจากราก) เท่านั้น: agent ของ node คือ
+    schedule[ply % len(schedule)] และการค้นหาหยุดที่ ply == horizon ทั้งสองค่า
+    คำนวณครั้งเดียวต่อ get_action แทนการคำนวณ agent/ความลึกถัดไปที่ทุก node
+    successor ถูกสร้างด้วย generatePacmanSuccessors/generateGhostSuccessors
+    (framework จึงนับ Expanded Nodes และเลือก action ที่ถูกต้องเอง) ส่วน hash,
+    feature และการค้นหาของลูกเกิดเฉพาะกับลูกที่ถูกค้นหาจริงก่อนการตัดกิ่ง
+
+    subclass กำหนด pruning (ใช้ alpha-beta หรือไม่), table/hasher
+    (Transposition Table) และ evaluation function ผ่าน leaf_value
+    """
+
+    # minimax ธรรมดาค้นหาทุกกิ่ง subclass ที่ใช้ alpha-beta ตั้งเป็น True
+    pruning = False
+
+    def __init__(self, depth='2', time_budget=None, workers='0', ghost_radius=None):
+        super().__init__()
+        self.depth = int(depth)
+        # จำนวน process สำหรับค้นหา action ที่รากแบบขนาน (0 = ค้นหาแบบ serial)
+        self.workers = int(workers)
+        # งบเวลาต่อ move (มิลลิวินาที) ถ้ากำหนดจะใช้ iterative deepening แทน depth
+        self.time_budget = None if time_budget is None else float(time_budget)
+        self.deadline = None
+        # ผีที่อยู่ไกลจาก Pacman เกินระยะนี้ถูกรวมเป็นชั้นเดียว (None = ค้นหาผีทุกตัว)
+        self.ghost_radius = None if ghost_radius is None else int(ghost_radius)
+        # ลำดับ agent และ ply ที่หยุดค้นหา (ตั้งค่าใน start_search)
+        self.schedule = None
+        self.length = 0
+        self.far_ghosts = ()
+        self.horizon = 0
+        # Transposition Table (None = ไม่ใช้) และ killer moves ของแต่ละ ply
+        self.hasher = None
+        self.table = None
+        # ถ้า evaluation - score ขึ้นกับข้อมูลที่ถูก hash เท่านั้น ค่าในตารางเก็บเป็น
+        # ผลต่างจาก score และใช้ข้าม state ที่ score ต่างกันได้ ไม่เช่นนั้น score
+        # เป็นส่วนหนึ่งของ key (leaf_value ของ SearchAgent คือ score เอง)
+        self.score_relative = True
+        self.killers = {}
+        # action ที่ดีที่สุดจากความลึกก่อนหน้าของ iterative deepening
+        self.root_action = None
+        # ตัวนับสถิติการค้นหา (ตั้งค่าโดย tools.instrumentation เมื่อเปิดใช้)
+        self.stats = None
+
+    def get_action(self, game_state: GameState):
+        """
+        คืนค่า Action ที่ดีที่สุดของ Pacman
+        """
+        self.start_search(game_state)
+        self.root_action = None
+        state_hash = self.hasher.hash_state(game_state) if self.table is not None else None
+        features = self.root_features(game_state)
+
+        # รอบก่อนหน้าของ iterative deepening ทิ้ง TT move และ killer moves
+        # ไว้ให้รอบถัดไปใช้จัดลำดับ move
+        if self.time_budget is not None:
+            return iterative_deepening(
+                lambda depth, deadline: self.search(game_state, state_hash, depth, deadline,
+                                                    features),
+                self.time_budget)
+
+        if self.workers > 1:
+            return parallel_root_search(type(self), self.agent_kwargs(), self.workers,
+                                        game_state, young_brothers_wait=self.pruning,
+                                        context=(self.schedule, self.far_ghosts))
+
+        # เริ่มต้นค้นหาจาก Pacman ที่ ply 0
+        _, best_action = self.get_value(game_state, 0, -float('inf'), float('inf'),
+                                        state_hash, features)
+        return best_action
+
+    def reset(self, state: GameState):
+        """
+        เตรียม agent ตัวเดิมสำหรับเกมใหม่ที่เริ่มจาก `state` (ใช้โดย tools.batchrun)
+
+        Transposition Table, Zobrist key, killer moves และ schedule ของเกมก่อน
+        ถูกล้าง ผลของแต่ละเกมจึงเหมือนกับ agent ที่เพิ่งสร้างใหม่ ไม่ว่า worker
+        จะเล่นเกมใดมาก่อน
+        """
+        if self.table is not None:
+            self.table.clear()
+            self.hasher = type(self.hasher)()
+        self.schedule = None
+        self.length = 0
+        self.far_ghosts = ()
+        self.horizon = 0
+        self.killers = {}
+        self.root_action = None
+
+    def start_search(self, state: GameState, context=None):
+        """
+        กำหนด schedule และ horizon ของการค้นหาที่เริ่มจาก state
+        (หรือใช้ (schedule, far_ghosts) ที่คำนวณไว้แล้วที่รากจาก context)
+        """
+        if context is None:
+            context = ply_schedule(state, self.ghost_radius)
+        schedule, self.far_ghosts = context
+        if self.table is not None:
+            # ค่าในตารางอ้างอิงจำนวน ply ที่เหลือตาม schedule เดิม
+            if schedule != self.schedule:
+                self.table.clear()
+            self.table.new_search()
+        self.schedule = schedule
+        self.length = len(schedule)
+        self.horizon = self.horizon_plies(self.depth)
+        self.killers = {}
+
+    def horizon_plies(self, depth):
+        """
+        จำนวน ply จากรากถึง leaf เมื่อค้นหาที่ความลึก depth (depth รอบเต็ม)
+        """
+        return depth * self.length
+
+    def agent_kwargs(self):
+        """
+        argument สำหรับสร้าง agent แบบเดียวกันใน worker process
+        """
+        return {'depth': str(self.depth), 'ghost_radius': self.ghost_radius}
+
+    def root_child_value(self, child_state: GameState, alpha, context=None):
+        """
+        ค่าของลูกหนึ่งตัวของราก ด้วยหน้าต่าง (alpha, +inf)
+        (ใช้โดย worker ใน parallel.py ซึ่งส่ง schedule ของรากมาใน context
+        ผีที่อยู่ไกลจึงเป็นชุดเดียวกับการค้นหาแบบ serial)
+        """
+        self.start_search(child_state, context)
+        value, _ = self.get_value(child_state, 1, alpha, float('inf'),
+                                  features=self.root_features(child_state))
+        return value
+
+    def search(self, game_state: GameState, state_hash, depth, deadline, features=None):
+        """
+        ค้นหาหนึ่งรอบของ iterative deepening ที่ความลึก depth
+        """
+        fixed_depth, fixed_horizon = self.depth, self.horizon
+        self.depth, self.horizon, self.deadline = depth, self.horizon_plies(depth), deadline
+        try:
+            _, best_action = self.get_value(game_state, 0, -float('inf'), float('inf'),
+                                            state_hash, features)
+        finally:
+            self.depth, self.horizon, self.deadline = fixed_depth, fixed_horizon, None
+        self.root_action = best_action
+        return best_action
+
+    def root_features(self, state: GameState):
+        return None
+
+    def child_features(self, features, state: GameState, successor_state: GameState,
+                       agent_index):
+        return None
+
+    def leaf_value(self, state: GameState, features):
+        return state.getScore()
+
+    def batch_leaf_values(self, state: GameState, successors, agent_index, features):
+        """
+        ค่าของลูกทุกตัวเมื่อลูกเป็น leaf ทั้งหมด (dict ของ action -> ค่า) หรือ None
+        """
+        return None
+
+    def get_value(self, state: GameState, ply, alpha, beta, state_hash=None, features=None):
+        """
+        ฟังก์ชันค้นหาแบบ Recursive หลัก คืน (ค่า, action)
+        """
+        # Base Case: ถ้าถึงความลึกสูงสุด หรือเกมจบแล้ว
+        if ply == self.horizon or state.isWin() or state.isLose():
+            return self.leaf_value(state, features), None
+
+        if self.deadline is not None:
+            self.deadline.check()
+
+        agent_index = self.schedule[ply % self.length]
+        table = self.table
+        tt_action = self.root_action if ply == 0 else None
+        if table is not None:
+            if state_hash is None:
+                state_hash = self.hasher.hash_state(state)
+
+            # ค่าในตารางเก็บเป็นผลต่างจาก score ของ node เพื่อให้ใช้ข้าม
+            # state ที่มาถึงด้วยลำดับ move ต่างกัน (หรือจากตาก่อนหน้า) ได้
+            # ถ้า evaluation function ไม่ได้เป็น score บวกค่าที่ขึ้นกับข้อมูลที่ถูก
+            # hash เท่านั้น ค่าจะถูกเก็บตรง ๆ และ score อยู่ใน key แทน
+            score = state.getScore()
+            if self.score_relative:
+                key = (state_hash, agent_index)
+                offset = score
+            else:
+                key = (state_hash, agent_index, score)
+                offset = 0
+            remaining = self.horizon - ply
+            entry = table.probe(key)
+            if entry is not None:
+                depth, value, bound, tt_action = entry
+                # ใช้เฉพาะค่าที่ค้นหามาด้วยความลึกเท่ากันพอดี ผลลัพธ์จึงเหมือน
+                # Alpha-Beta ปกติทุกประการ และที่รากต้องค้นหาจริงเสมอเพื่อให้ได้ action
+                if depth == remaining and ply != 0:
+                    value += offset
+                    if bound == EXACT or (bound == LOWER and value > beta) \
+                            or (bound == UPPER and value < alpha):
+                        if self.stats is not None:
+                            self.stats.tt_hits += 1
+                        return value, tt_action
+
+        # ถ้าเป็นตาของ Pacman (Maximizer)
+        if agent_index == 0:
+            value, action = self.max_value(state, ply, alpha, beta, state_hash, tt_action,
+                                           features)
+        # ผีที่อยู่ไกลทุกตัวเดินพร้อมกัน
+        elif agent_index == MERGED:
+            value, action = self.merged_value(state, ply, alpha, beta, state_hash, features)
+        # ถ้าเป็นตาของผี (Minimizer)
+        else:
+            value, action = self.min_value(state, ply, agent_index, alpha, beta, state_hash,
+                                           tt_action, features)
+
+        if table is not None:
+            # ค่าที่ตกนอกช่วง [alpha, beta] เป็นเพียงขอบเขต ไม่ใช่ค่าจริง
+            if value < alpha:
+                bound = UPPER
+            elif value > beta:
+                bound = LOWER
+            else:
+                bound = EXACT
+            table.store(key, remaining, value - offset, bound, action)
+        return value, action
+
+    def child_value(self, state: GameState, successor_state: GameState, agent_index, ply,
+                    alpha, beta, state_hash, features):
+        """
+        คืนค่าของ successor หนึ่งตัว (hash และ feature ของลูกคำนวณเมื่อจะค้นหาเท่านั้น)
+        """
+        successor_hash = None
+        if self.table is not None:
+            successor_hash = self.hasher.successor_hash(state_hash, state, successor_state,
+                                                        agent_index)
+        return self.get_value(successor_state, ply, alpha, beta, successor_hash,
+                              self.child_features(features, state, successor_state,
+                                                  agent_index))
+
+    def ordered_successors(self, successors, tt_action, ply):
+        """
+        เรียง successor ให้ลอง TT move ก่อน ตามด้วย killer moves แล้วจึงที่เหลือ
+        """
+        killers = self.killers.get(ply, ())
+        if tt_action is None and not killers:
+            return successors
+
+        def rank(successor):
+            action = successor[1]
+            if action == tt_action:
+                return 0
+            if action in killers:
+                return 1
+            return 2
+
+        return sorted(successors, key=rank)
+
+    def record_killer(self, ply, action):
+        """
+        จำ action ที่ทำให้เกิด cutoff ไว้ไม่เกิน 2 ตัวต่อ ply
+        """
+        killers = self.killers.setdefault(ply, [])
+        if action not in killers:
+            killers.insert(0, action)
+            del killers[2:]
+
+    def max_value(self, state: GameState, ply, alpha, beta, state_hash=None, tt_action=None,
+                  features=None):
+        # ใช้ generatePacmanSuccessors เพื่อให้มีการนับ Expanded Nodes
+        successors = state.generatePacmanSuccessors()
+        if not successors:
+            return self.leaf_value(state, features), None
+
+        stats = self.stats
+        if stats is not None:
+            stats.expanded += 1
+            stats.generated += len(successors)
+
+        max_val = -float('inf')
+        best_action = None
+        next_ply = ply + 1
+
+        # ที่ราก ถ้าค่าเท่ากันให้เลือก action ที่มาก่อนตามลำดับ successor เสมอ
+        # ผลลัพธ์จึงไม่ขึ้นกับการจัดลำดับ move (และตรงกับ parallel.py)
+        rank = {action: i for i, (_, action) in enumerate(successors)} if ply == 0 else None
+
+        for successor_state, action in self.ordered_successors(successors, tt_action, ply):
+            val, _ = self.child_value(state, successor_state, 0, next_ply, alpha, beta,
+                                      state_hash, features)
+            if val > max_val or (rank is not None and val == max_val
+                                 and rank[action] < rank[best_action]):
+                max_val = val
+                best_action = action
+
+            if self.pruning:
+                if max_val > beta:
+                    self.record_killer(ply, action)
+                    if stats is not None:
+                        stats.cutoffs += 1
+                    return max_val, best_action # Pruning
+                alpha = max(alpha, max_val)
+
+        return max_val, best_action
+
+    def min_value(self, state: GameState, ply, agent_index, alpha, beta, state_hash=None,
+                  tt_action=None, features=None):
+        # ใช้ generateGhostSuccessors เพื่อให้มีการนับ Expanded Nodes
+        successors = state.generateGhostSuccessors(agent_index)
+        if not successors:
+            return self.leaf_value(state, features), None
+
+        stats = self.stats
+        if stats is not None:
+            stats.expanded += 1
+            stats.generated += len(successors)
+
+        min_val = float('inf')
+        best_action = None
+        next_ply = ply + 1
+
+        leaf_values = None
+        if next_ply == self.horizon:
+            leaf_values = self.batch_leaf_values(state, successors, agent_index, features)
+
+        for successor_state, action in self.ordered_successors(successors, tt_action, ply):
+            if leaf_values is not None:
+                val = leaf_values[action]
+            else:
+                val, _ = self.child_value(state, successor_state, agent_index, next_ply,
+                                          alpha, beta, state_hash, features)
+            if val < min_val:
+                min_val = val
+                best_action = action
+
+            if self.pruning:
+                if min_val < alpha:
+                    self.record_killer(ply, action)
+                    if stats is not None:
+                        stats.cutoffs += 1
+                    return min_val, best_action # Pruning
+                beta = min(beta, min_val)
+
+        # best_action ของผีใช้เพื่อจัดลำดับ move ในการค้นหาครั้งถัดไปเท่านั้น
+        return min_val, best_action
+
+    def merged_value(self, state: GameState, ply, alpha, beta, state_hash=None, features=None):
+        """
+        ชั้นของผีที่อยู่ไกล: ผีแต่ละตัวเดินเข้าหา Pacman (หรือหนีถ้ากลัวอยู่)
+        หนึ่งก้าวตามระยะ Manhattan จึงค้นหาต่อจากลูกเพียงตัวเดียว
+        """
+        stats = self.stats
+        if stats is not None:
+            stats.expanded += 1
+
+        for ghost in self.far_ghosts:
+            if state.isWin() or state.isLose():
+                break
+            successors = state.generateGhostSuccessors(ghost)
+            if not successors:
+                continue
+            if stats is not None:
+                stats.generated += len(successors)
+
+            pacman = state.getPacmanPosition()
+            x, y = state.getGhostPosition(ghost)
+            sign = -1 if state.getGhostState(ghost).scaredTimer > 0 else 1
+
+            def distance(successor):
+                dx, dy = Actions.directionToVector(successor[1])
+                return sign * manhattan_distance((x + dx, y + dy), pacman)
+
+            successor_state, _ = min(successors, key=distance)
+            if self.table is not None:
+                state_hash = self.hasher.successor_hash(state_hash, state, successor_state, ghost)
+            features = self.child_features(features, state, successor_state, ghost)
+            state = successor_state
+
+        value, _ = self.get_value(state, ply + 1, alpha, beta, state_hash, features)
+        return value, None
@@ -0,0 +1,140 @@
+# transposition.py
+
+import random
+
+# ประเภทของค่าที่เก็บในตาราง
+EXACT = 0
+LOWER = 1  # ค่าจริง >= ค่าที่เก็บ (ถูกตัดที่ max node)
+UPPER = 2  # ค่าจริง <= ค่าที่เก็บ (ถูกตัดที่ min node)
+
+
+class ZobristHasher:
+    """
+    สร้าง Zobrist hash 64 บิตจากตำแหน่งของ Pacman, ผี, อาหาร, แคปซูล, เวลาที่ผี
+    แต่ละตัวยังกลัวอยู่ (scaredTimer) ซึ่งมีผลต่อ score และ evaluation และทิศทาง
+    ของผี (ผีเดินย้อนกลับไม่ได้ successor ของผีจึงขึ้นกับทิศทางด้วย)
+
+    แต่ละ (ชนิด, ตำแหน่ง) จะได้เลขสุ่มประจำตัวหนึ่งค่า แล้ว hash ของ state
+    คือ XOR ของเลขเหล่านั้นทั้งหมด จึงอัปเดตจาก parent ไป child ได้ทันที
+    โดยไม่ต้องสแกน food grid ใหม่ทุกโหนด
+    """
+
+    def __init__(self, seed=0):
+        self.random = random.Random(seed)
+        self.keys = {}
+
+    def _key(self, kind, position):
+        # สุ่มเลขประจำตัวเมื่อเจอตำแหน่งนี้ครั้งแรก (ตำแหน่งผีอาจเป็นทศนิยม)
+        item = (kind, position)
+        value = self.keys.get(item)
+        if value is None:
+            value = self.random.getrandbits(64)
+            self.keys[item] = value
+        return value
+
+    def hash_state(self, state):
+        """
+        คำนวณ hash ของ state ตั้งแต่ต้น (ใช้ที่ราก)
+        """
+        h = self._key('pacman', state.getPacmanPosition())
+        for index, position in enumerate(state.getGhostPositions(), 1):
+            h ^= self._key(index, position)
+            ghost_state = state.getGhostState(index)
+            h ^= self._key(-index, ghost_state.scaredTimer)
+            h ^= self._key(('direction', index), ghost_state.getDirection())
+        for position in state.getFood().asList():
+            h ^= self._key('food', position)
+        for position in state.getCapsules():
+            h ^= self._key('capsule', position)
+        return h
+
+    def successor_hash(self, parent_hash, parent, child, agent_index):
+        """
+        คำนวณ hash ของ child จาก hash ของ parent หลังจาก agent_index เดิน
+        """
+        h = parent_hash
+        if agent_index == 0:
+            old_position = parent.getPacmanPosition()
+            new_position = child.getPacmanPosition()
+            h ^= self._key('pacman', old_position) ^ self._key('pacman', new_position)
+
+            x, y = new_position
+            if parent.hasFood(x, y):
+                h ^= self._key('food', new_position)
+            if new_position in parent.getCapsules():
+                h ^= self._key('capsule', new_position)
+
+            # Pacman อาจกินผี ทำให้ผีกลับไปจุดเกิด
+            for index, (old, new) in enumerate(
+                    zip(parent.getGhostPositions(), child.getGhostPositions()), 1):
+                if old != new:
+                    h ^= self._key(index, old) ^ self._key(index, new)
+            # และอาจกินแคปซูลหรือผี ทำให้ scaredTimer (และทิศทางของผีที่ถูกกิน) เปลี่ยน
+            for index in range(1, child.getNumAgents()):
+                h = self._ghost_state_hash(h, parent, child, index)
+        else:
+            old_position = parent.getGhostPosition(agent_index)
+            new_position = child.getGhostPosition(agent_index)
+            if old_position != new_position:
+                h ^= self._key(agent_index, old_position) ^ self._key(agent_index, new_position)
+            # ทิศทางของผีที่เดินเปลี่ยน scaredTimer ลดลงเมื่อผีเดิน และผีที่ชน
+            # Pacman ตอนกลัวจะกลับจุดเกิด
+            for index in range(1, child.getNumAgents()):
+                h = self._ghost_state_hash(h, parent, child, index)
+        return h
+
+    def _ghost_state_hash(self, h, parent, child, index):
+        old_state = parent.getGhostState(index)
+        new_state = child.getGhostState(index)
+        if old_state.scaredTimer != new_state.scaredTimer:
+            h ^= self._key(-index, old_state.scaredTimer) ^ self._key(-index, new_state.scaredTimer)
+        old_direction = old_state.getDirection()
+        new_direction = new_state.getDirection()
+        if old_direction != new_direction:
+            kind = ('direction', index)
+            h ^= self._key(kind, old_direction) ^ self._key(kind, new_direction)
+        return h
+
+
+class TranspositionTable:
+    """
+    ตาราง Transposition ขนาดคงที่ แบบ depth-preferred replacement
+
+    แต่ละช่องเก็บ (key, depth, value, bound, best_action, generation)
+    ช่องจะถูกแทนที่เมื่อว่าง, มาจากการค้นหาครั้งก่อน (generation เก่า)
+    หรือเมื่อค่าใหม่ค้นหาลึกกว่าหรือเท่ากับค่าเดิม
+    """
+
+    def __init__(self, size=1 << 16):
+        self.size = size
+        self.slots = [None] * size
+        self.generation = 0
+        self.hits = 0
+
+    def new_search(self):
+        """
+        เริ่มการค้นหาใหม่ ค่าเก่ายังใช้ได้แต่จะถูกแทนที่ก่อน
+        """
+        self.generation += 1
+
+    def clear(self):
+        """
+        ล้างค่าทั้งหมดในตาราง (เช่น เมื่อความหมายของ key เปลี่ยน)
+        """
+        self.slots = [None] * self.size
+
+    def probe(self, key):
+        """
+        คืนค่า (depth, value, bound, best_action) ของ key หรือ None
+        """
+        entry = self.slots[hash(key) % self.size]
+        if entry is None or entry[0] != key:
+            return None
+        self.hits += 1
+        return entry[1:5]
+
+    def store(self, key, depth, value, bound, best_action):
+        index = hash(key) % self.size
+        entry = self.slots[index]
+        if entry is None or entry[5] != self.generation or depth >= entry[1]:
+            self.slots[index] = (key, depth, value, bound, best_action, self.generation)
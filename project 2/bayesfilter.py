@@ -1,12 +1,56 @@
 # Complete this class for all parts of the project
 
+import hashlib
+import os
+from collections import OrderedDict
+
 from pacman_module.game import Agent
 import numpy as np
-from pacman_module import util
 from scipy.stats import binom
 from pacman_module.pacman import Directions
 from pacman_module.game import Actions
 
+# ระยะของช่องที่เป็นกำแพงใน distance grid (ไกลกว่าระยะจริงทุกค่า)
+WALL_DISTANCE = 1 << 20
+
+# จำนวน Transition Model (ตามตำแหน่งของ Pacman) ที่เก็บไว้ใช้ซ้ำ
+TRANSITION_CACHE_SIZE = 256
+
+# จำนวนตำแหน่งของ Pacman ที่คำนวณพร้อมกันตอนสร้างไฟล์ transition
+PRECOMPUTE_CHUNK = 256
+
+# วิธีอัปเดต belief: 'exact' (Bayes filter บนทุกช่อง) หรือ 'particles' (particle filter)
+FILTER_MODES = ('exact', 'particles')
+NUM_PARTICLES = 2000
+
+# จำนวน noise ของ sensor ที่สุ่มไว้ล่วงหน้าต่อครั้ง
+EVIDENCE_BLOCK = 4096
+
+# ความละเอียดของ belief ใน Bayes filter: float64, float32 หรือ log (log-probability
+# แบบ float64 ไม่ underflow แม้เกมยาวมาก)
+PRECISIONS = ('float64', 'float32', 'log')
+
+
+class BeliefBuffers:
+    """
+    Array ที่จองไว้ล่วงหน้าสำหรับอัปเดต belief ของผีทุกตัวแบบ in-place
+    (ใช้ซ้ำทุก tick ตราบที่จำนวนผีเท่าเดิม)
+    """
+    __slots__ = ('belief', 'output', 'predicted', 'gathered', 'sensor', 'offsets', 'distance',
+                 'total')
+
+    def __init__(self, num_ghosts, shape, dtype, log_space):
+        cells = shape[0] * shape[1]
+        # belief ในรูปที่ใช้คำนวณ (log-probability ถ้า log_space) และ belief ที่คืนให้ผู้เรียก
+        self.belief = np.zeros((num_ghosts,) + shape, dtype=dtype)
+        self.output = np.zeros((num_ghosts,) + shape, dtype=dtype) if log_space else self.belief
+        self.predicted = np.empty((num_ghosts, cells), dtype=dtype)
+        self.gathered = np.empty((num_ghosts, cells), dtype=dtype)
+        self.sensor = np.empty((num_ghosts, cells), dtype=dtype)
+        self.offsets = np.empty((num_ghosts, cells), dtype=np.intp)
+        self.distance = np.empty(cells, dtype=np.intp)
+        self.total = np.empty(num_ghosts, dtype=dtype)
+
 
 class BeliefStateAgent(Agent):
     def __init__(self, args):
@@ -31,147 +75,554 @@ class BeliefStateAgent(Agent):
         self.p = 0.5
         self.n = int(self.sensor_variance / (self.p * (1 - self.p)))
 
-        # พารามิเตอร์สำหรับ Transition Model
-        # ค่านี้จะถูกตั้งค่าตามประเภทของผีใน `_get_transition_model`
-        self.fear_factor = 1.0
+        # ตาราง PMF ของ Binomial(n, p) สำหรับ k = -1..n+1 (ค่าที่ขอบเป็นศูนย์)
+        # คำนวณครั้งเดียว แล้ว sensor model ใช้การเปิดตารางแทน binom.pmf
+        self.sensor_table = np.zeros(self.n + 3)
+        self.sensor_table[1:-1] = binom.pmf(np.arange(self.n + 1), self.n, self.p)
+
+        # belief ของ Bayes filter ถูกอัปเดตใน buffer เดิมทุก tick ด้วย out=
+        self.precision = getattr(args, 'precision', None) or 'float64'
+        if self.precision not in PRECISIONS:
+            raise ValueError("Unknown precision '{}' (choose from {})".format(
+                self.precision, ', '.join(PRECISIONS)))
+        self.log_space = self.precision == 'log'
+        self.dtype = np.float32 if self.precision == 'float32' else np.float64
+        with np.errstate(divide='ignore'):
+            self.filter_sensor_table = (np.log(self.sensor_table) if self.log_space
+                                        else self.sensor_table.astype(self.dtype))
+        self.buffers = None
+
+        # ข้อมูลของ layout (เตรียมใน `_prepare_layout` เมื่อรู้ walls)
+        self.wall_mask = None
+        self.grid_x = None
+        self.grid_y = None
+        self.uniform_belief = None
+        self.transition_from = None
+        self.transition_to = None
+        self.transition_indptr = None
+        self.transition_slots = None
+        self.transition_sources = None
+        self.filter_uniform_belief = None
+
+        # พารามิเตอร์สำหรับ Transition Model ขึ้นกับประเภทของผี
+        if self.ghost_type == 'scared':
+            self.fear_factor = 2**3
+        elif self.ghost_type == 'afraid':
+            self.fear_factor = 2
+        else: # confused
+            self.fear_factor = 1
 
+        # Transition Model ขึ้นกับ walls ประเภทของผี และตำแหน่งของ Pacman เท่านั้น
+        # จึงเก็บไว้ใน LRU cache ตาม (ตำแหน่งของ Pacman, ประเภทของผี)
+        self.transition_cache = OrderedDict()
+        cache_size = getattr(args, 'transitioncache', None)
+        self.transition_cache_size = (TRANSITION_CACHE_SIZE if cache_size is None
+                                      else int(cache_size))
+        # ถ้ากำหนด directory ไว้ จะคำนวณทิศทางที่หนี Pacman ของทุกตำแหน่งของ
+        # Pacman ครั้งเดียวต่อ layout และเก็บเป็นไฟล์ memory-mapped
+        self.transition_dir = getattr(args, 'transitiondir', None)
+        self.transition_flags = None
+
+        # Particle filter: ต้นทุนต่อ tick ขึ้นกับจำนวน particle แทนจำนวนช่อง
+        self.filter_mode = getattr(args, 'filter', None) or 'exact'
+        if self.filter_mode not in FILTER_MODES:
+            raise ValueError("Unknown filter mode '{}' (choose from {})".format(
+                self.filter_mode, ', '.join(FILTER_MODES)))
+        self.num_particles = int(getattr(args, 'particles', None) or NUM_PARTICLES)
+        # random stream แยกกันสำหรับ evidence และ particle ทั้งคู่มาจาก args.seed
+        self._seed_streams(getattr(args, 'seed', None))
+        # particles[i, j] คือ index ของช่องที่ particle j ของผีตัวที่ i อยู่
+        self.particles = None
+        # การเดินออกจากแต่ละช่อง (เตรียมใน `_prepare_layout`) แบบ padded:
+        # ช่อง c ไปช่อง move_cells[c, k] ได้ สำหรับ k < move_counts[c]
+        self.move_cells = None
+        self.move_counts = None
+        self.cell_x = None
+        self.cell_y = None
+
+        # noise ของ sensor (binomial - n*p) สุ่มเป็นก้อนจาก self.evidence_rng
+        # แล้วใช้ทีละค่า จนหมดจึงสุ่มก้อนใหม่
+        self.noise_buffer = np.empty(0)
+        self.noise_index = 0
+        # ถ้ากำหนดไฟล์ไว้ จะอ่าน evidence จากไฟล์แทนการสุ่ม (บรรทัดละหนึ่ง tick
+        # แต่ละบรรทัดคือ noisy distance ของผีทุกตัวคั่นด้วยช่องว่าง)
+        self.evidence_file = getattr(args, 'evidencefile', None)
+        self.replay = None
+        self.replay_index = 0
+
+    def _seed_streams(self, seed):
+        evidence_seed, particle_seed = np.random.SeedSequence(seed).spawn(2)
+        self.evidence_rng = np.random.default_rng(evidence_seed)
+        self.rng = np.random.default_rng(particle_seed)
+
+    def reset(self, state, seed=None):
+        """
+        เตรียม agent ตัวเดิมสำหรับเกมใหม่ที่เริ่มจาก `state` (ใช้โดย tools.batchrun)
 
-    def _get_sensor_model(self, pacman_position, evidence):
+        belief, particle, noise และตำแหน่งในไฟล์ evidence เริ่มใหม่ และ random
+        stream ถูกสร้างใหม่จาก `seed` ส่วนข้อมูลของ layout และ Transition Model
+        ใน cache ถูกเก็บไว้ถ้า walls ยังเหมือนเดิม
         """
-        คำนวณ Sensor Model P(E_t | X_t)
-        
-        Return:
-        -------
-        2D numpy array ขนาด [width, height] ที่แต่ละช่อง (w, h)
-        คือค่าความน่าจะเป็น P(E_t=evidence | X_t=(w, h))
+        walls = state.getWalls()
+        if self.walls is not None and walls != self.walls:
+            self.wall_mask = None
+            self.buffers = None
+            self.transition_cache.clear()
+            self.transition_flags = None
+        self.walls = walls
+
+        self.beliefGhostStates = None
+        self.particles = None
+        self._seed_streams(seed)
+        self.noise_buffer = np.empty(0)
+        self.noise_index = 0
+        self.replay_index = 0
+
+
+    def _prepare_layout(self):
+        """
+        เตรียมข้อมูลของ layout ที่ใช้ซ้ำได้ทุก tick (เรียกครั้งเดียวหลังรู้ walls)
         """
         width, height = self.walls.width, self.walls.height
-        sensor_model = np.zeros((width, height))
+        self.wall_mask = np.array(self.walls.data, dtype=bool)
+        self.grid_x = np.arange(width)[:, None]
+        self.grid_y = np.arange(height)[None, :]
+
+        # belief แบบ uniform บนช่องที่ไม่ใช่กำแพง
+        self.uniform_belief = (~self.wall_mask) / np.count_nonzero(~self.wall_mask)
 
-        # วนลูปทุกตำแหน่งที่เป็นไปได้ของผี
+        # โครงสร้างของ Transition Model: ทุกคู่ (X_t, X_t+1) ที่ผีเดินไปได้
+        # เรียงตามช่องปลายทางเป็นรูปแบบ CSR (index ของช่อง (w, h) คือ w * height + h)
+        pairs = []
         for w in range(width):
             for h in range(height):
                 if not self.walls[w][h]:
-                    # คำนวณระยะห่างจริง (Manhattan distance)
-                    true_distance = util.manhattanDistance((w, h), pacman_position)
-                    
-                    # คำนวณค่า k สำหรับ PMF ของ Binomial distribution
-                    # จาก noisy_dist = true_dist + k' - n*p
-                    # --> k' = noisy_dist - true_dist + n*p
-                    k = evidence - true_distance + self.n * self.p
-
-                    # คำนวณความน่าจะเป็นที่จะได้ evidence นี้ ถ้าผีอยู่ที่ (w, h)
-                    prob = binom.pmf(k, self.n, self.p)
-                    sensor_model[w, h] = prob
-        
-        return sensor_model
+                    neighbors = Actions.getLegalNeighbors((w, h), self.walls)
+                    # ถ้าไม่มีทางไปต่อ ผีจะอยู่ที่เดิม
+                    for next_w, next_h in neighbors or [(w, h)]:
+                        pairs.append((next_w * height + next_h, w * height + h))
+        pairs.sort()
+        self.transition_to = np.array([pair[0] for pair in pairs], dtype=np.intp)
+        self.transition_from = np.array([pair[1] for pair in pairs], dtype=np.intp)
+        self.transition_indptr = np.zeros(width * height + 1, dtype=np.intp)
+        np.cumsum(np.bincount(self.transition_to, minlength=width * height),
+                  out=self.transition_indptr[1:])
+        # ช่องต้นทางของแต่ละช่องปลายทางแบบ padded: ผีมาถึงช่อง c ได้จากช่อง
+        # transition_sources[k, c] (ช่องที่เติมให้ครบชี้ไปที่ c เองและมีความน่าจะเป็นศูนย์)
+        cells = width * height
+        sources_per_cell = np.diff(self.transition_indptr)
+        self.transition_slots = (np.arange(self.transition_to.size) -
+                                 np.repeat(self.transition_indptr[:-1], sources_per_cell))
+        self.transition_sources = np.tile(np.arange(cells), (max(1, int(sources_per_cell.max())), 1))
+        self.transition_sources[self.transition_slots, self.transition_to] = self.transition_from
+
+        with np.errstate(divide='ignore'):
+            self.filter_uniform_belief = (np.log(self.uniform_belief) if self.log_space
+                                          else self.uniform_belief.astype(self.dtype))
+
+        # การเดินเรียงตามช่องต้นทาง สำหรับเลื่อน particle (ช่องละไม่เกิน 5 ทาง)
+        self.move_counts = np.bincount(self.transition_from, minlength=cells)
+        max_moves = max(1, int(self.move_counts.max()))
+        order = np.argsort(self.transition_from, kind='stable')
+        slots = np.arange(order.size) - np.repeat(np.cumsum(self.move_counts) - self.move_counts,
+                                                   self.move_counts)
+        self.cell_x, self.cell_y = np.divmod(np.arange(cells), height)
+        self.move_cells = np.repeat(np.arange(cells), max_moves).reshape(cells, max_moves)
+        self.move_cells[self.transition_from[order], slots] = self.transition_to[order]
+
+        if self.transition_dir is not None:
+            self.transition_flags = self._load_transition_flags()
+
+    def _load_transition_flags(self):
+        """
+        เปิด (หรือสร้างถ้ายังไม่มี) ไฟล์ memory-mapped ของ layout นี้ ที่เก็บว่า
+        การเดินแต่ละคู่ใน Transition Model ไม่ทำให้เข้าใกล้ Pacman หรือไม่
 
+        Return:
+        -------
+        numpy uint8 array ขนาด [width * height, ceil(จำนวนคู่ / 8)] ที่แถว c คือ
+        ค่าเมื่อ Pacman อยู่ที่ช่อง c (ไม่ขึ้นกับประเภทของผี) เก็บแบบ np.packbits
+        คู่ละ 1 บิต ไฟล์จึงเล็กกว่า bool array 8 เท่า (อ่านด้วย _unpack_flags)
+        """
+        height = self.walls.height
+        cells = self.wall_mask.size
+        shape = (cells, (self.transition_from.size + 7) // 8)
+        digest = hashlib.sha1(repr(self.wall_mask.shape).encode() +
+                              self.wall_mask.tobytes()).hexdigest()[:16]
+        path = os.path.join(self.transition_dir, 'transitions_packed_{}.npy'.format(digest))
+
+        if os.path.exists(path):
+            flags = np.load(path, mmap_mode='r')
+            if flags.shape == shape and flags.dtype == np.uint8:
+                return flags
+
+        # เขียนลงไฟล์ชั่วคราวก่อน เผื่อมีหลาย process สร้างไฟล์เดียวกันพร้อมกัน
+        os.makedirs(self.transition_dir, exist_ok=True)
+        temporary = '{}.{}.tmp'.format(path, os.getpid())
+        flags = np.lib.format.open_memmap(temporary, mode='w+', dtype=np.uint8, shape=shape)
+        from_x, from_y = np.divmod(self.transition_from, height)
+        to_x, to_y = np.divmod(self.transition_to, height)
+        for start in range(0, cells, PRECOMPUTE_CHUNK):
+            pacman_x, pacman_y = np.divmod(np.arange(start, min(start + PRECOMPUTE_CHUNK, cells)),
+                                           height)
+            pacman_x, pacman_y = pacman_x[:, None], pacman_y[:, None]
+            flags[start:start + PRECOMPUTE_CHUNK] = np.packbits(
+                np.abs(to_x - pacman_x) + np.abs(to_y - pacman_y) >=
+                np.abs(from_x - pacman_x) + np.abs(from_y - pacman_y), axis=1)
+        flags.flush()
+        del flags
+        os.replace(temporary, path)
+        return np.load(path, mmap_mode='r')
+
+    def _unpack_flags(self, cell):
+        """
+        คืนแถว `cell` ของไฟล์ transition เป็น bool array ขนาด [จำนวนคู่]
+        """
+        return np.unpackbits(self.transition_flags[cell],
+                             count=self.transition_from.size).astype(bool)
 
-    def _get_transition_model(self, pacman_position):
+    def _get_distance_grid(self, pacman_position):
         """
-        คำนวณ Transition Model P(X_t+1 | X_t)
-        
+        คืน Manhattan distance จาก Pacman ไปทุกช่องเป็น array [width, height]
+        ช่องที่เป็นกำแพงมีระยะเป็นค่าที่มากพอให้ค่าใน sensor model เป็นศูนย์
+        """
+        if self.wall_mask is None:
+            self._prepare_layout()
+        x, y = pacman_position
+        distances = np.abs(self.grid_x - int(x)) + np.abs(self.grid_y - int(y))
+        distances[self.wall_mask] = WALL_DISTANCE
+        return distances
+
+    def _get_sensor_models(self, pacman_position, evidences):
+        """
+        คำนวณ Sensor Model P(E_t | X_t) ของผีทุกตัวพร้อมกัน
+
         Return:
         -------
-        4D numpy array ขนาด [width, height, width, height] ที่แต่ละช่อง
-        (w1, h1, w2, h2) คือ P(X_t+1=(w1, h1) | X_t=(w2, h2))
+        3D numpy array ขนาด [num_ghosts, width, height] ที่ช่อง (i, w, h)
+        คือ P(E_t=evidences[i] | X_t=(w, h)) ของผีตัวที่ i
         """
-        width, height = self.walls.width, self.walls.height
-        transition_model = np.zeros((width, height, width, height))
+        return self._get_likelihoods(evidences, self._get_distance_grid(pacman_position)[None])
 
-        # กำหนดค่า fear_factor ตามประเภทของผี
-        if self.ghost_type == 'scared':
-            self.fear_factor = 2**3
-        elif self.ghost_type == 'afraid':
-            self.fear_factor = 2
-        else: # confused
-            self.fear_factor = 1
-        
-        # วนลูปทุกตำแหน่งเริ่มต้นที่เป็นไปได้ (X_t)
-        for w2 in range(width):
-            for h2 in range(height):
-                if not self.walls[w2][h2]:
-                    pos_t = (w2, h2)
-                    possible_actions = Actions.getLegalNeighbors(pos_t, self.walls)
-                    
-                    # ถ้าไม่มีทางไปต่อ ผีจะอยู่ที่เดิม
-                    if not possible_actions:
-                         transition_model[w2, h2, w2, h2] = 1.0
-                         continue
+    def _get_likelihoods(self, evidences, distances):
+        """
+        คืน P(E_t=evidences[i] | ระยะจริง = distances[i, ...]) ด้วยการเปิดตาราง PMF
+        (แกนแรกของ `distances` คือผี และ broadcast ได้)
+        """
+        # จาก noisy_dist = true_dist + k' - n*p --> k' = noisy_dist - true_dist + n*p
+        # ค่า k' ที่ไม่เป็นจำนวนเต็มมีความน่าจะเป็นเป็นศูนย์ (ใช้ index -1)
+        base = np.asarray(evidences, dtype=float) + self.n * self.p
+        base = np.where(base == np.floor(base), base, -1).astype(int)
 
-                    dist = util.Counter()
-                    current_distance = util.manhattanDistance(pos_t, pacman_position)
+        k = base.reshape((-1,) + (1,) * (distances.ndim - 1)) - distances
+        # sensor_table[k + 1] = P(k) โดยที่ค่านอกช่วง [0, n] ถูก clip ไปที่ช่องศูนย์
+        np.clip(k, -1, self.n + 1, out=k)
+        return self.sensor_table[k + 1]
 
-                    for action_pos in possible_actions:
-                        succ_distance = util.manhattanDistance(action_pos, pacman_position)
-                        # ให้คะแนนสูงขึ้นกับการกระทำที่ทำให้ระยะห่างจาก Pacman เพิ่มขึ้น
-                        dist[action_pos] = self.fear_factor if succ_distance >= current_distance else 1
-                    
-                    dist.normalize()
+    def _get_sensor_model(self, pacman_position, evidence):
+        """
+        คำนวณ Sensor Model P(E_t | X_t)
+        
+        Return:
+        -------
+        2D numpy array ขนาด [width, height] ที่แต่ละช่อง (w, h)
+        คือค่าความน่าจะเป็น P(E_t=evidence | X_t=(w, h))
+        """
+        return self._get_sensor_models(pacman_position, [evidence])[0]
 
-                    # กำหนดค่าความน่าจะเป็นในการเปลี่ยนตำแหน่ง
-                    for next_pos, prob in dist.items():
-                        w1, h1 = next_pos
-                        transition_model[w1, h1, w2, h2] = prob
 
+    def _get_transition_model(self, pacman_position):
+        """
+        คำนวณ Transition Model P(X_t+1 | X_t)
+        
+        Return:
+        -------
+        2D numpy array ขนาด [จำนวนช่องต้นทางสูงสุด, width * height] ที่ช่อง (k, c)
+        คือ P(X_t+1=c | X_t=transition_sources[k, c]) (index ของช่อง (w, h) คือ
+        w * height + h) ใน dtype ของ precision ที่เลือก
+        """
+        key = (tuple(pacman_position), self.ghost_type)
+        transition_model = self.transition_cache.get(key)
+        if transition_model is not None:
+            self.transition_cache.move_to_end(key)
+            return transition_model
+
+        if self.wall_mask is None:
+            self._prepare_layout()
+
+        # โครงสร้างของ matrix (ช่องไหนไปช่องไหนได้) ขึ้นกับ walls อย่างเดียว
+        # แต่ละตำแหน่งของ Pacman คำนวณใหม่แค่น้ำหนักของแต่ละการเดิน
+        cells = self.wall_mask.size
+        if self.transition_flags is not None:
+            x, y = pacman_position
+            farther = self._unpack_flags(int(x) * self.walls.height + int(y))
+        else:
+            distances = self._get_distance_grid(pacman_position).ravel()
+            farther = distances[self.transition_to] >= distances[self.transition_from]
+
+        # ให้คะแนนสูงขึ้นกับการกระทำที่ทำให้ระยะห่างจาก Pacman เพิ่มขึ้น
+        weights = np.where(farther, float(self.fear_factor), 1.0)
+        totals = np.bincount(self.transition_from, weights, minlength=cells)
+        transition_model = np.zeros(self.transition_sources.shape, dtype=self.dtype)
+        transition_model[self.transition_slots, self.transition_to] = \
+            weights / totals[self.transition_from]
+
+        if self.transition_cache_size > 0:
+            self.transition_cache[key] = transition_model
+            if len(self.transition_cache) > self.transition_cache_size:
+                self.transition_cache.popitem(last=False)
         return transition_model
 
 
+    def _get_buffers(self, num_ghosts):
+        buffers = self.buffers
+        if buffers is None or buffers.belief.shape[0] != num_ghosts:
+            buffers = self.buffers = BeliefBuffers(num_ghosts, self.wall_mask.shape, self.dtype,
+                                                   self.log_space)
+        return buffers
+
     def _get_updated_belief(self, belief, evidences, pacman_position, ghosts_eaten):
         """
-        อัปเดต Belief State โดยใช้ Bayes Filter
+        อัปเดต Belief State ของผีทุกตัวพร้อมกันโดยใช้ Bayes Filter
+
+        ทุกขั้นตอนเขียนผลลงใน buffer ที่จองไว้ (out=) จึงแทบไม่จอง memory ใหม่
+        ในแต่ละ tick ผลลัพธ์ที่คืนจึงถูกเขียนทับใน tick ถัดไป (update_belief_state
+        คืนสำเนาของมันให้ผู้เรียก)
+
+        Return:
+        -------
+        3D numpy array ขนาด [num_ghosts, width, height] (belief ของผีตัวที่ i
+        คือ array[i])
         """
-        updated_beliefs = []
+        if self.wall_mask is None:
+            self._prepare_layout()
+        num_ghosts = len(belief)
+        buffers = self._get_buffers(num_ghosts)
+        state = buffers.belief.reshape(num_ghosts, -1)
+
+        # belief ที่ไม่ได้มาจาก tick ก่อน (เช่น belief เริ่มต้น) ต้องแปลงเข้า buffer ก่อน
+        if belief is not buffers.output:
+            np.copyto(buffers.belief, np.asarray(belief, dtype=float), casting='unsafe')
+            if self.log_space:
+                with np.errstate(divide='ignore'):
+                    np.log(buffers.belief, out=buffers.belief)
+
+        total = buffers.total
+        if self.log_space:
+            # ทำ prediction ใน probability space ของ belief ที่หารด้วยค่ามากที่สุด
+            # (ค่ามากสุดเป็น 1 จึงไม่ underflow) ตัวคูณที่หายไปถูกชดเชยตอน normalize
+            source = buffers.output.reshape(num_ghosts, -1)
+            np.max(state, axis=1, out=total)
+            total[np.isneginf(total)] = 0
+            np.subtract(state, total[:, None], out=source)
+            np.exp(source, out=source)
+        else:
+            source = state
+
+        # 1. Prediction Step
+        # P(X_t) = Σ [ P(X_t | X_{t-1}) * P(X_{t-1}) ] รวมทีละช่องต้นทางของแต่ละช่อง
         transition_model = self._get_transition_model(pacman_position)
+        predicted, gathered = buffers.predicted, buffers.gathered
+        for k, sources in enumerate(self.transition_sources):
+            target = predicted if k == 0 else gathered
+            np.take(source, sources, axis=1, out=target, mode='clip')
+            np.multiply(target, transition_model[k], out=target)
+            if k > 0:
+                np.add(predicted, gathered, out=predicted)
+
+        # 2. Update Step
+        # P(X_t | E_t) ∝ P(E_t | X_t) * P(X_t)
+        self._get_filter_sensor_models(pacman_position, evidences, buffers)
+        if self.log_space:
+            with np.errstate(divide='ignore'):
+                np.log(predicted, out=predicted)
+            np.add(predicted, buffers.sensor, out=state)
+
+            # 3. Normalization: ลบ log ของผลรวม (คำนวณแบบเลื่อนด้วยค่ามากที่สุด)
+            np.max(state, axis=1, out=total)
+            collapsed = np.isneginf(total)
+            total[collapsed] = 0
+            np.subtract(state, total[:, None], out=state)
+            np.exp(state, out=source)
+            np.sum(source, axis=1, out=total)
+            total[collapsed] = 1
+            np.log(total, out=total)
+            np.subtract(state, total[:, None], out=state)
+        else:
+            np.multiply(predicted, buffers.sensor, out=state)
 
-        for i, (prev_belief, evidence, eaten) in enumerate(zip(belief, evidences, ghosts_eaten)):
-            # ถ้าผีกินไปแล้ว belief state จะเป็นศูนย์
-            if eaten:
-                updated_beliefs.append(np.zeros_like(prev_belief))
-                continue
-            
-            # 1. Prediction Step
-            # P(X_t) = Σ [ P(X_t | X_{t-1}) * P(X_{t-1}) ]
-            predicted_belief = np.tensordot(transition_model, prev_belief, axes=([2, 3], [0, 1]))
-
-            # 2. Update Step
-            # P(X_t | E_t) ∝ P(E_t | X_t) * P(X_t)
-            sensor_model = self._get_sensor_model(pacman_position, evidence)
-            unnormalized_belief = sensor_model * predicted_belief
-            
             # 3. Normalization
-            total_prob = np.sum(unnormalized_belief)
-            if total_prob > 0:
-                updated_belief = unnormalized_belief / total_prob
-            else:
-                # ถ้าไม่มีความน่าจะเป็นเหลืออยู่เลย ให้กลับไปเป็น uniform
-                width, height = self.walls.width, self.walls.height
-                num_positions = width * height - self.walls.count()
-                updated_belief = np.ones_like(prev_belief) / num_positions
-                updated_belief[self.walls.data] = 0
+            np.sum(state, axis=1, out=total)
+            collapsed = total <= 0
+            total[collapsed] = 1
+            np.divide(state, total[:, None], out=state)
+
+        # ถ้าไม่มีความน่าจะเป็นเหลืออยู่เลย ให้กลับไปเป็น uniform
+        buffers.belief[collapsed] = self.filter_uniform_belief
+        # ถ้าผีกินไปแล้ว belief state จะเป็นศูนย์
+        buffers.belief[np.asarray(ghosts_eaten, dtype=bool)] = -np.inf if self.log_space else 0
+
+        if self.log_space:
+            np.exp(buffers.belief, out=buffers.output)
+        return buffers.output
+
+    def _get_filter_sensor_models(self, pacman_position, evidences, buffers):
+        """
+        คำนวณ Sensor Model ของผีทุกตัวลงใน buffers.sensor (ขนาด [num_ghosts,
+        width * height]) ใน dtype ของ precision ที่เลือก ช่องที่เป็นกำแพงไม่ถูก
+        กำหนดค่าเป็นศูนย์ เพราะ belief ที่ช่องนั้นเป็นศูนย์อยู่แล้ว
+        """
+        x, y = pacman_position
+        distance = buffers.distance
+        np.subtract(self.cell_x, int(x), out=distance)
+        np.abs(distance, out=distance)
+        offsets = buffers.offsets
+        np.subtract(self.cell_y, int(y), out=offsets[0])
+        np.abs(offsets[0], out=offsets[0])
+        np.add(distance, offsets[0], out=distance)
+
+        # k' = noisy_dist - true_dist + n*p แล้วเลื่อนเป็น index ของตาราง (ดู `_get_likelihoods`)
+        base = np.asarray(evidences, dtype=float) + self.n * self.p
+        base = np.where(base == np.floor(base), base + 1, 0).astype(np.intp)
+        np.subtract(base[:, None], distance, out=offsets)
+        np.clip(offsets, 0, self.n + 2, out=offsets)
+        np.take(self.filter_sensor_table, offsets, out=buffers.sensor, mode='clip')
+
+
+    def _systematic_resample(self, weights):
+        """
+        สุ่ม index ตามน้ำหนักของแต่ละแถวด้วย systematic resampling
 
-            updated_beliefs.append(updated_belief)
+        Arguments:
+        ----------
+        - `weights`: 2D numpy array ขนาด [rows, columns] (แต่ละแถวไม่จำเป็น
+          ต้องรวมเป็น 1 แต่ต้องมีผลรวมมากกว่าศูนย์)
 
-        return updated_beliefs
+        Return:
+        -------
+        2D numpy array ขนาด [rows, num_particles] ของ index ของ column
+        """
+        num_rows, columns = weights.shape
+        cumulative = np.cumsum(weights, axis=1)
+        cumulative /= cumulative[:, -1:]
+        # จุดสุ่มห่างกันเท่า ๆ กัน 1/N เลื่อนด้วยค่าสุ่มค่าเดียวต่อแถว
+        points = (self.rng.random((num_rows, 1)) + np.arange(self.num_particles)) \
+            / self.num_particles
+        # ค้นหาทุกแถวใน searchsorted ครั้งเดียว โดยเลื่อนแต่ละแถวไปช่วง [i, i + 1)
+        rows = np.arange(num_rows)[:, None]
+        indices = np.searchsorted((cumulative + rows).ravel(), (points + rows).ravel(),
+                                  side='right')
+        indices = indices.reshape(num_rows, -1) - rows * columns
+        return np.minimum(indices, columns - 1)
+
+    def _get_updated_particles(self, particles, evidences, pacman_position):
+        """
+        อัปเดต particle ของผีทุกตัวด้วย particle filter (ต้นทุนขึ้นกับจำนวน
+        particle ไม่ขึ้นกับขนาดของ layout)
 
+        Return:
+        -------
+        2D numpy array ขนาด [num_ghosts, num_particles] ของ index ของช่อง
+        """
+        x, y = pacman_position
+        x, y = int(x), int(y)
+
+        # 1. Prediction Step: เลื่อนแต่ละ particle ตาม P(X_t+1 | X_t) ของช่องที่อยู่
+        # (คำนวณเฉพาะช่องที่มี particle ไม่ต้องสร้าง Transition Model ทั้งหมด)
+        cell_distance = np.abs(self.cell_x - x) + np.abs(self.cell_y - y)
+        current_distance = cell_distance[particles]
+        targets = self.move_cells[particles]
+        succ_distance = cell_distance[targets]
+
+        # ให้คะแนนสูงขึ้นกับการกระทำที่ทำให้ระยะห่างจาก Pacman เพิ่มขึ้น
+        weights = np.where(succ_distance >= current_distance[..., None],
+                           float(self.fear_factor), 1.0)
+        counts = self.move_counts[particles]
+        weights[np.arange(weights.shape[2]) >= counts[..., None]] = 0.0
+        cumulative = np.cumsum(weights, axis=2)
+        draws = self.rng.random(particles.shape) * cumulative[..., -1]
+        choices = (draws[..., None] >= cumulative).sum(axis=2)
+        np.minimum(choices, counts - 1, out=choices)
+        moved = np.take_along_axis(targets, choices[..., None], axis=2)[..., 0]
+
+        # 2. Update Step: น้ำหนักของแต่ละ particle คือ P(E_t | X_t)
+        weights = self._get_likelihoods(evidences, cell_distance[moved])
+
+        # 3. Resampling
+        collapsed = weights.sum(axis=1) <= 0
+        weights[collapsed] = 1.0
+        resampled = np.take_along_axis(moved, self._systematic_resample(weights), axis=1)
+        # ถ้าทุก particle มีน้ำหนักเป็นศูนย์ ให้กลับไปเป็น uniform
+        if collapsed.any():
+            uniform = np.broadcast_to(self.uniform_belief.ravel(),
+                                      (int(collapsed.sum()), self.wall_mask.size))
+            resampled[collapsed] = self._systematic_resample(uniform)
+        return resampled
+
+    def _particles_to_beliefs(self, particles, ghosts_eaten):
+        """
+        แปลง particle เป็น belief grid ขนาด [num_ghosts, width, height]
+        """
+        num_ghosts = particles.shape[0]
+        cells = self.wall_mask.size
+        offsets = np.arange(num_ghosts)[:, None] * cells
+        counts = np.bincount((particles + offsets).ravel(), minlength=num_ghosts * cells)
+        beliefs = counts.reshape((num_ghosts,) + self.wall_mask.shape) / particles.shape[1]
+        # ถ้าผีกินไปแล้ว belief state จะเป็นศูนย์
+        beliefs[np.asarray(ghosts_eaten, dtype=bool)] = 0
+        return beliefs
 
     def update_belief_state(self, evidences, pacman_position, ghosts_eaten):
-        belief = self._get_updated_belief(self.beliefGhostStates, evidences,
-                                          pacman_position, ghosts_eaten)
+        if self.filter_mode == 'particles':
+            if self.wall_mask is None:
+                self._prepare_layout()
+            if self.particles is None:
+                initial = np.asarray(self.beliefGhostStates, dtype=float)
+                self.particles = self._systematic_resample(initial.reshape(initial.shape[0], -1))
+            self.particles = self._get_updated_particles(self.particles, evidences,
+                                                         pacman_position)
+            # particle filter ไม่ใช้ belief grid เอง จึงสร้างเฉพาะตอนที่ต้องคืนค่า
+            belief = self._particles_to_beliefs(self.particles, ghosts_eaten)
+        else:
+            belief = self._get_updated_belief(self.beliefGhostStates, evidences,
+                                              pacman_position, ghosts_eaten)
+            # belief คือ buffer ที่ tick ถัดไปเขียนทับ agent จึงเก็บ buffer ไว้ใช้ต่อ
+            # แต่คืนสำเนาให้ผู้เรียก ซึ่งอาจเก็บ belief ของหลาย tick ไว้
+            self.beliefGhostStates = belief
+            return belief.copy()
         self.beliefGhostStates = belief
         return belief
 
-    def _get_evidence(self, state):
-        positions = state.getGhostPositions()
-        pacman_position = state.getPacmanPosition()
-        noisy_distances = []
-
-        for pos in positions:
-            true_distance = util.manhattanDistance(pos, pacman_position)
-            noise = binom.rvs(self.n, self.p) - self.n*self.p
-            noisy_distances.append(true_distance + noise)
+    def _get_noise(self, count):
+        """
+        คืน noise ของ sensor `count` ค่าจาก buffer ที่สุ่มไว้ล่วงหน้า
+        """
+        if self.noise_index + count > self.noise_buffer.size:
+            self.noise_buffer = (self.evidence_rng.binomial(self.n, self.p,
+                                                            max(EVIDENCE_BLOCK, count))
+                                 - self.n * self.p)
+            self.noise_index = 0
+        noise = self.noise_buffer[self.noise_index:self.noise_index + count]
+        self.noise_index += count
+        return noise
 
-        return noisy_distances
+    def _get_evidence(self, state):
+        if self.evidence_file is not None:
+            if self.replay is None:
+                self.replay = np.loadtxt(self.evidence_file, ndmin=2)
+            if self.replay_index >= len(self.replay):
+                raise ValueError("Evidence file '{}' has only {} ticks".format(
+                    self.evidence_file, len(self.replay)))
+            noisy_distances = self.replay[self.replay_index]
+            self.replay_index += 1
+            return noisy_distances.tolist()
+
+        positions = np.array(state.getGhostPositions(), dtype=float).reshape(-1, 2)
+        pacman_position = np.array(state.getPacmanPosition(), dtype=float)
+        true_distances = np.abs(positions - pacman_position).sum(axis=1)
+        noisy_distances = true_distances + self._get_noise(len(true_distances))
+
+        return noisy_distances.tolist()
 
     def _record_metrics(self, belief_states, state):
         pass
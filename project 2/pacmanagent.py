@@ -1,9 +1,55 @@
 # Complete this class for all parts of the project
 
+import random
+
 from pacman_module.game import Agent
+from pacman_module.game import Actions
 from pacman_module.pacman import Directions
 import numpy as np
-from pacman_module.util import manhattanDistance
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import shortest_path
+
+# ทิศทางที่ Pacman เดินได้ในแบบจำลองตำแหน่ง (ไม่รวม STOP)
+MOVES = (Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST)
+
+# คะแนนของการกินอาหาร/แคปซูล และ discount ของคะแนนที่ได้ในตาถัด ๆ ไป
+FOOD_REWARD = 10
+CAPSULE_REWARD = 50
+DISCOUNT = 0.9
+LOOKAHEAD = 2
+
+# ตาราง maze distance ของแต่ละ layout (คำนวณครั้งเดียวต่อ layout)
+_distance_tables = {}
+
+
+def maze_distances(walls):
+    """
+    คืนตาราง numpy ขนาด [cells, cells] ของระยะทางจริงในเขาวงกตระหว่างทุกช่อง
+    (ช่อง (x, y) มี index x * height + y) ช่องที่ไปไม่ถึงมีระยะเท่ากับจำนวนช่อง
+    """
+    key = (walls.width, walls.height, tuple(tuple(column) for column in walls.data))
+    table = _distance_tables.get(key)
+    if table is not None:
+        return table
+
+    width, height = walls.width, walls.height
+    cells = width * height
+    rows, columns = [], []
+    for x in range(width):
+        for y in range(height):
+            if walls[x][y]:
+                continue
+            for nx, ny in ((x + 1, y), (x, y + 1)):
+                if nx < width and ny < height and not walls[nx][ny]:
+                    rows.append(x * height + y)
+                    columns.append(nx * height + ny)
+    graph = csr_matrix((np.ones(len(rows)), (rows, columns)), shape=(cells, cells))
+    table = shortest_path(graph, directed=False, unweighted=True).astype(np.float32)
+    table[np.isinf(table)] = cells
+
+    _distance_tables[key] = table
+    return table
+
 
 class PacmanAgent(Agent):
     def __init__(self, args):
@@ -13,6 +59,81 @@ class PacmanAgent(Agent):
         - `args`: Namespace of arguments from command-line prompt.
         """
         self.args = args
+        # จำนวนตาที่มองไปข้างหน้า (อย่างน้อย 1 ไม่เช่นนั้นการค้นหาจะไม่หยุด)
+        lookahead = getattr(args, 'lookahead', None)
+        self.depth = LOOKAHEAD if lookahead is None else int(lookahead)
+        if self.depth < 1:
+            raise ValueError("Lookahead must be at least 1 (got '{}')".format(lookahead))
+
+        # แบบจำลองตำแหน่งของ layout (เตรียมเมื่อเจอ walls ครั้งแรก)
+        self.walls = None
+        self.height = None
+        self.distances = None
+        # moves[c] คือ list ของ (action, ช่องถัดไป) ที่เดินได้จากช่อง c
+        self.moves = None
+
+    def _prepare_layout(self, walls):
+        self.walls = walls
+        self.height = walls.height
+        self.distances = maze_distances(walls)
+        self.moves = []
+        for x in range(walls.width):
+            for y in range(walls.height):
+                cell_moves = []
+                if not walls[x][y]:
+                    for action in MOVES:
+                        dx, dy = Actions.directionToVector(action)
+                        nx, ny = int(x + dx), int(y + dy)
+                        if not walls[nx][ny]:
+                            cell_moves.append((action, nx * walls.height + ny))
+                self.moves.append(cell_moves)
+
+    def _cell(self, position):
+        x, y = position
+        return int(x) * self.height + int(y)
+
+    def _rewards(self, state, cells):
+        """
+        คืน dict ของคะแนนที่ได้เมื่อเดินเข้าช่องที่มีอาหารหรือแคปซูล (เฉพาะใน `cells`)
+        """
+        rewards = {}
+        height = self.height
+        for cell in cells:
+            x, y = divmod(cell, height)
+            if state.hasFood(x, y):
+                rewards[cell] = FOOD_REWARD
+        for position in state.getCapsules():
+            cell = self._cell(position)
+            rewards[cell] = rewards.get(cell, 0) + CAPSULE_REWARD
+        return rewards
+
+    def _reachable(self, start):
+        """
+        คืนช่องทั้งหมดที่ไปถึงได้ภายใน self.depth ตาจากช่อง start
+        """
+        reachable = {start}
+        frontier = [start]
+        for _ in range(self.depth):
+            frontier = [next_cell for cell in frontier for _, next_cell in self.moves[cell]
+                        if next_cell not in reachable]
+            reachable.update(frontier)
+        return list(reachable)
+
+    def _path_value(self, cell, depth, closest, rewards, visited):
+        """
+        ค่าที่ดีที่สุดของเส้นทางที่เริ่มจากการเดินเข้าช่อง `cell` และเดินต่ออีก
+        `depth` ตาตามแบบจำลองตำแหน่ง: ทุกตาได้คะแนนของช่องที่ยังไม่เคยผ่าน
+        บนเส้นทาง ลบด้วยระยะคาดหวังไปยังผีที่ใกล้ที่สุด (ลดลงตาละ DISCOUNT)
+        """
+        value = (0 if cell in visited else rewards.get(cell, 0)) - closest[cell]
+        if depth == 0:
+            return value
+        best = -float('inf')
+        visited.append(cell)
+        for _, next_cell in self.moves[cell]:
+            best = max(best, self._path_value(next_cell, depth - 1, closest, rewards, visited))
+        visited.pop()
+        return value + DISCOUNT * best
 
     def get_action(self, state, belief_state):
         """
@@ -20,7 +141,7 @@ class PacmanAgent(Agent):
                 returns a legal move.
         """
         # XXX: Your code here to obtain bonus
-        
+
         legal_moves = state.getLegalPacmanActions()
         if Directions.STOP in legal_moves:
             legal_moves.remove(Directions.STOP)
@@ -28,54 +149,47 @@ class PacmanAgent(Agent):
         if not legal_moves:
             return Directions.STOP
 
-        best_move = Directions.STOP
-        max_score = -float('inf')
+        walls = state.getWalls()
+        if walls is not self.walls:
+            self._prepare_layout(walls)
 
-        # หาตำแหน่งที่น่าจะเป็นที่สุดของผีแต่ละตัว
-        ghost_positions = []
-        for belief in belief_state:
-            if np.sum(belief) > 0:
-                # unravel_index ใช้เปลี่ยน flat index ไปเป็น coordinate
-                max_prob_pos = np.unravel_index(np.argmax(belief, axis=None), belief.shape)
-                ghost_positions.append(max_prob_pos)
-        
-        # ถ้าไม่มีผีเหลืออยู่ ก็ให้เดินหาอาหารแทน
-        if not ghost_positions:
-             # (อาจจะเพิ่มโค้ดหาอาหารที่นี่)
-             return random.choice(legal_moves)
-
-        pacman_pos = state.getPacmanPosition()
-
-        # ประเมินคะแนนของแต่ละ action ที่ทำได้
-        for move in legal_moves:
-            successor_state = state.generatePacmanSuccessor(move)
-            if successor_state is None:
-                continue
+        pacman_cell = self._cell(state.getPacmanPosition())
+
+        # belief ของผีที่ยังไม่ถูกกิน เป็น matrix [num_ghosts, cells]
+        beliefs = np.asarray(belief_state, dtype=float)
+        beliefs = beliefs.reshape(len(beliefs), -1)
+        beliefs = beliefs[beliefs.sum(axis=1) > 0]
+
+        # ถ้าไม่มีผีเหลืออยู่ ก็ให้เดินไปหาอาหารที่ใกล้ที่สุดแทน
+        if len(beliefs) == 0:
+            food = state.getFood().asList()
+            if not food:
+                return random.choice(legal_moves)
+            targets = np.array([self._cell(position) for position in food], dtype=np.intp)
+            best_move, best_distance = None, float('inf')
+            for move, next_cell in self.moves[pacman_cell]:
+                if move in legal_moves:
+                    distance = self.distances[next_cell, targets].min()
+                    if distance < best_distance:
+                        best_move, best_distance = move, distance
+            return best_move if best_move is not None else random.choice(legal_moves)
 
-            successor_pos = successor_state.getPacmanPosition()
-            score = 0
-            
-            # คำนวณระยะห่างไปยังผีที่ใกล้ที่สุด
-            min_dist_to_ghost = float('inf')
-            if ghost_positions:
-                distances = [manhattanDistance(successor_pos, g_pos) for g_pos in ghost_positions]
-                min_dist_to_ghost = min(distances)
-
-            # ให้คะแนนสูงถ้าเข้าใกล้ผี
-            # ยิ่งใกล้ คะแนนยิ่งสูง (ใช้ 1/distance)
-            score -= min_dist_to_ghost 
-            
-            # เพิ่มคะแนนถ้ากินอาหารได้
-            if state.hasFood(successor_pos[0], successor_pos[1]):
-                score += 10
-                
-            # เพิ่มคะแนนถ้ากินแคปซูล
-            if successor_pos in state.getCapsules():
-                score += 50
+        # ระยะ maze distance คาดหวังไปยังผีแต่ละตัว จากทุกช่องที่ไปถึงได้ในการมองไปข้างหน้า
+        # E[d(c, ghost_i)] = Σ_x d(c, x) P(ghost_i = x) คือ dot product ของแถวในตารางกับ belief
+        cells = self._reachable(pacman_cell)
+        rewards = self._rewards(state, cells)
+        expected = self.distances[cells] @ beliefs.T
+        closest = dict(zip(cells, expected.min(axis=1).tolist()))
 
+        best_move = Directions.STOP
+        max_score = -float('inf')
+        for move, next_cell in self.moves[pacman_cell]:
+            if move not in legal_moves:
+                continue
+            score = self._path_value(next_cell, self.depth - 1, closest, rewards, [])
             if score > max_score:
                 max_score = score
                 best_move = move
 
         # XXX: End of your code here to obtain bonus
-        return best_move
\ No newline at end of file
+        return best_move
@@ -0,0 +1,79 @@
+"""
+Helpers shared by the tests: puts every project directory on sys.path and
+builds game states on small layouts.
+
+The course framework (`pacman_module`) is not part of the repository, so
+tests that need it call `require_framework()` and are skipped without it.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for project in ('Project 0', 'Project 1', 'project 2', 'tutorial python'):
+    sys.path.insert(0, os.path.join(REPO_ROOT, project))
+sys.path.insert(0, REPO_ROOT)
+
+# Three ghosts and a capsule, so that scared timers come into play
+THREE_GHOSTS = """
+%%%%%%%%%%%%
+%P.  . G  .%
+% %%%% %% %%
+%.  o .G. G%
+% %%  %%%% %
+%. . .   . %
+%%%%%%%%%%%%
+"""
+
+# Two ghosts and a capsule, small enough for an exhaustive reference search
+TWO_GHOSTS = """
+%%%%%%%%%%
+%P.  o  G%
+% %% %%% %
+%.  . G. %
+%%%%%%%%%%
+"""
+
+
+def require_framework():
+    pytest.importorskip('pacman_module')
+
+
+def initial_state(text=THREE_GHOSTS):
+    """
+    Returns the initial GameState of a layout given as text.
+    """
+    from pacman_module.layout import Layout
+    from pacman_module.pacman import GameState
+    layout = Layout([line for line in text.strip('\n').split('\n')])
+    state = GameState()
+    state.initialize(layout, layout.getNumGhosts())
+    return state
+
+
+def random_ghosts(state, rng):
+    """
+    Moves every ghost once at random, stopping when the game ends.
+    """
+    for index in range(1, state.getNumAgents()):
+        if state.isWin() or state.isLose():
+            break
+        state = state.generateSuccessor(index, rng.choice(state.getLegalActions(index)))
+    return state
+
+
+def played_states(choose, moves, seed=0, text=THREE_GHOSTS):
+    """
+    Returns the states met when Pacman plays `choose(state)` for up to
+    `moves` moves against random ghosts.
+    """
+    rng = random.Random(seed)
+    state = initial_state(text)
+    states = []
+    while len(states) < moves and not (state.isWin() or state.isLose()):
+        states.append(state)
+        state = random_ghosts(state.generateSuccessor(0, choose(state)), rng)
+    return states
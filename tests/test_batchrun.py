@@ -0,0 +1,37 @@
+"""
+Games played by tools.batchrun must not depend on the number of workers,
+i.e. on which games a worker's agents played before.
+"""
+
+import os
+
+import pytest
+
+from pacman_states import REPO_ROOT, require_framework
+
+LAYOUT = os.environ.get('PACMAN_TEST_LAYOUT', 'smallClassic')
+
+
+def play_batch(agent, workers, games=6):
+    from tools.batchrun import run_batch
+    settings = {
+        'agent': agent,
+        'depth': 2,
+        'ghost': 'random',
+        'seed': 0,
+        'sensor_variance': 1.0,
+        'max_moves': 40,
+        'repo': REPO_ROOT,
+    }
+    results = []
+    assert run_batch(settings, [LAYOUT], games, 0, workers, results.append) == games
+    return {result['game']: (result['moves'], result['score'], result['win'], result['nodes'])
+            for result in results}
+
+
+@pytest.mark.parametrize('agent', ['bfs', 'astar', 'alphabeta', 'expectimax'])
+def test_results_do_not_depend_on_worker_count(agent):
+    require_framework()
+    if __import__('pacman_module.layout').layout.getLayout(LAYOUT) is None:
+        pytest.skip("layout '{}' is not available".format(LAYOUT))
+    assert play_batch(agent, 1) == play_batch(agent, 2)
@@ -0,0 +1,56 @@
+"""
+Beliefs returned by the project 2 belief-state agent.
+"""
+
+import random
+from argparse import Namespace
+
+import numpy as np
+import pytest
+
+from pacman_states import played_states, require_framework
+
+
+@pytest.mark.parametrize('precision', ['float64', 'float32', 'log'])
+@pytest.mark.parametrize('mode', ['exact', 'particles'])
+def test_returned_beliefs_are_not_overwritten(precision, mode):
+    require_framework()
+    from bayesfilter import BeliefStateAgent
+    agent = BeliefStateAgent(Namespace(ghostagent='confused', sensorvariance=1.0, seed=0,
+                                       precision=precision, filter=mode))
+    rng = random.Random(0)
+    returned, copies = [], []
+    for state in played_states(lambda state: rng.choice(state.getLegalActions(0)), 10):
+        beliefs, _ = agent.get_action(state)
+        returned.append(beliefs)
+        copies.append(np.array(beliefs, copy=True))
+    assert len(returned) > 2
+    for beliefs, copy in zip(returned, copies):
+        np.testing.assert_array_equal(beliefs, copy)
+
+
+def test_packed_transition_file_gives_the_same_models(tmp_path):
+    require_framework()
+    from bayesfilter import BeliefStateAgent
+    states = played_states(lambda state: state.getLegalActions(0)[0], 10)
+
+    def agent(**kwargs):
+        agent = BeliefStateAgent(Namespace(ghostagent='scared', sensorvariance=1.0, seed=0,
+                                           transitioncache=0, **kwargs))
+        agent.walls = states[0].getWalls()
+        return agent
+
+    packed, computed = agent(transitiondir=str(tmp_path)), agent()
+    for state in states:
+        position = state.getPacmanPosition()
+        np.testing.assert_array_equal(packed._get_transition_model(position),
+                                      computed._get_transition_model(position))
+
+    flags = packed.transition_flags
+    assert flags.dtype == np.uint8
+    assert flags.shape == (packed.wall_mask.size, (packed.transition_from.size + 7) // 8)
+    # a second agent maps the file written by the first one
+    second = agent(transitiondir=str(tmp_path))
+    second._prepare_layout()
+    assert second.transition_flags.filename == flags.filename
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,23 @@
+"""
+Pure helpers of tools.benchmark (no framework needed).
+"""
+
+import pytest
+
+import pacman_states  # noqa: F401 (puts the repository root on sys.path)
+from tools.benchmark import percentile
+
+
+@pytest.mark.parametrize('fraction, expected', [
+    (0.0, 1), (0.05, 1), (0.1, 1), (0.15, 2), (0.5, 5), (0.51, 6), (0.7, 7),
+    (0.9, 9), (0.95, 10), (0.99, 10), (1.0, 10)])
+def test_percentile_is_nearest_rank(fraction, expected):
+    assert percentile(list(range(10, 0, -1)), fraction) == expected
+
+
+def test_percentile_of_small_lists():
+    assert percentile([], 0.5) == 0.0
+    assert percentile([3.0], 0.99) == 3.0
+    # banker's rounding used to give the upper value for p50 of two values
+    assert percentile([1.0, 2.0], 0.5) == 1.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.25) == 1.0
@@ -0,0 +1,61 @@
+"""
+FeatureEvaluator: the numpy batch path against one-state evaluation.
+"""
+
+import random
+
+import pytest
+
+from pacman_states import THREE_GHOSTS, played_states, require_framework
+
+
+# Crossroads where a ghost that cannot reverse still has 3 actions
+CROSSROADS = """
+%%%%%%%%%
+%P. . . %
+%.%.%.%.%
+%. .G. .%
+%.%.%.%.%
+%o . . G%
+%%%%%%%%%
+"""
+
+
+def random_play(seed, text=THREE_GHOSTS):
+    rng = random.Random(seed)
+    return played_states(lambda state: rng.choice(state.getLegalActions(0)), 40, seed, text)
+
+
+def test_values_match_value_exactly():
+    require_framework()
+    from evaluation import FeatureEvaluator
+    evaluator = FeatureEvaluator()
+    features = [evaluator.features(state) for seed in range(3) for state in random_play(seed)]
+    # the random games eat the capsule, so both ghost terms are covered
+    assert any(any(item.scared) for item in features)
+    assert evaluator.values(features).tolist() == [evaluator.value(item) for item in features]
+
+
+def counting_evaluator(**kwargs):
+    from evaluation import FeatureEvaluator
+
+    class CountingEvaluator(FeatureEvaluator):
+        batches = 0
+
+        def values(self, features_list):
+            self.batches += 1
+            return super().values(features_list)
+
+    return CountingEvaluator(**kwargs)
+
+
+@pytest.mark.parametrize('module', ['hminimax', 'expectimax'])
+def test_default_threshold_uses_the_batch_path(module):
+    require_framework()
+    agent_class = __import__(module).PacmanAgent
+    batched = agent_class('2', eval_fn=counting_evaluator())
+    single = agent_class('2', eval_fn=counting_evaluator(batch_threshold=5))
+    for state in random_play(0, CROSSROADS):
+        assert batched.get_action(state) == single.get_action(state)
+    assert batched.evaluation_function.batches > 0
+    assert single.evaluation_function.batches == 0
@@ -0,0 +1,76 @@
+"""
+tools.instrumentation with a stand-in agent (no framework needed).
+"""
+
+import tracemalloc
+
+import pacman_states  # noqa: F401 (puts the repository root on sys.path)
+from tools.instrumentation import LatencyReservoir, instrument
+
+
+class Agent:
+    stats = None
+
+    def get_action(self, state):
+        self.stats.expanded += 1
+        return 'Stop'
+
+
+def test_close_keeps_tracing_started_by_the_caller():
+    tracemalloc.start()
+    try:
+        instrumentation = instrument(Agent(), trace_memory=True)
+        instrumentation.agent.get_action(None)
+        instrumentation.close()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_close_stops_its_own_tracing():
+    assert not tracemalloc.is_tracing()
+    instrumentation = instrument(Agent(), trace_memory=True)
+    assert tracemalloc.is_tracing()
+    instrumentation.close()
+    assert not tracemalloc.is_tracing()
+
+
+def test_latencies_are_bounded():
+    reservoir = LatencyReservoir(size=100)
+    for i in range(50):
+        reservoir.add(float(i))
+    assert reservoir.sample == [float(i) for i in range(50)]
+
+    for i in range(50, 10000):
+        reservoir.add(float(i))
+    assert len(reservoir.sample) == 100
+    assert len(reservoir) == 10000
+    assert reservoir.max == 9999.0
+    # a uniform sample of 0..9999 has its median near 5000
+    assert 3000 < sorted(reservoir.sample)[50] < 7000
+
+
+def test_instrumentation_records_into_the_reservoir():
+    agent = Agent()
+    instrumentation = instrument(agent)
+    for _ in range(3):
+        agent.get_action(None)
+    instrumentation.close()
+    assert instrumentation.latencies.count == 3
+    assert len(instrumentation.latencies.sample) == 3
+    assert instrumentation.totals.expanded == 3
+
+
+def test_records_are_kept_only_on_request():
+    agent = Agent()
+    instrumentation = instrument(agent)
+    agent.get_action(None)
+    instrumentation.close()
+    assert instrumentation.records is None
+
+    instrumentation = instrument(agent, keep_records=True)
+    agent.get_action(None)
+    agent.get_action(None)
+    instrumentation.close()
+    assert [record['call'] for record in instrumentation.records] == [1, 2]
+    assert instrumentation.records[0]['expanded'] == 1
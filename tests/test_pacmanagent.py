@@ -0,0 +1,25 @@
+"""
+Arguments of the project 2 Pacman agent.
+"""
+
+from argparse import Namespace
+
+import pytest
+
+from pacman_states import require_framework
+
+
+@pytest.mark.parametrize('lookahead', ['0', '-1', 0, -3])
+def test_lookahead_below_one_is_rejected(lookahead):
+    require_framework()
+    from pacmanagent import PacmanAgent
+    with pytest.raises(ValueError):
+        PacmanAgent(Namespace(lookahead=lookahead))
+
+
+def test_lookahead_defaults():
+    require_framework()
+    from pacmanagent import LOOKAHEAD, PacmanAgent
+    assert PacmanAgent(Namespace()).depth == LOOKAHEAD
+    assert PacmanAgent(Namespace(lookahead=None)).depth == LOOKAHEAD
+    assert PacmanAgent(Namespace(lookahead='3')).depth == 3
@@ -0,0 +1,47 @@
+import pytest
+
+from pacman_states import played_states, require_framework
+
+
+@pytest.mark.parametrize('module, depth', [('minimax', '2'), ('hminimax', '2'), ('hminimax', '3'),
+                                           ('expectimax', '2'), ('expectimax', '3')])
+def test_parallel_matches_serial_over_a_game(module, depth):
+    # Both agents keep their tables across moves, over a layout with a capsule
+    require_framework()
+    agent_class = __import__(module).PacmanAgent
+    serial = agent_class(depth)
+    parallel = agent_class(depth, workers='2')
+    for seed in range(2):
+        for state in played_states(serial.get_action, 15, seed=seed):
+            assert parallel.get_action(state) == serial.get_action(state)
+
+
+@pytest.mark.parametrize('module', ['hminimax', 'expectimax'])
+def test_parallel_merges_the_same_far_ghosts_as_serial(module):
+    # Far ghosts are chosen once at the root, not again from each root child
+    require_framework()
+    from evaluation import FeatureEvaluator
+    agent_class = __import__(module).PacmanAgent
+    serial = agent_class('2', eval_fn=FeatureEvaluator(), ghost_radius='3')
+    parallel = agent_class('2', eval_fn=FeatureEvaluator(), workers='2', ghost_radius='3')
+    for seed in range(2):
+        for state in played_states(serial.get_action, 30, seed=seed):
+            assert parallel.get_action(state) == serial.get_action(state)
+
+
+def test_agents_with_their_own_evaluator_share_a_pool():
+    # The pool is keyed on the agent class and worker count, not on eval_fn
+    require_framework()
+    import parallel
+    from evaluation import FeatureEvaluator
+    from hminimax import PacmanAgent
+    serial = PacmanAgent('2', eval_fn=FeatureEvaluator())
+    states = played_states(serial.get_action, 10)
+    for weights in [None, None, (2.0, -1.5, -20.0, 10.0, 0.5, -20.0)]:
+        eval_fn = FeatureEvaluator() if weights is None else FeatureEvaluator(weights)
+        serial = PacmanAgent('2', eval_fn=eval_fn)
+        parallel_agent = PacmanAgent('2', eval_fn=FeatureEvaluator(eval_fn.weight_list),
+                                     workers='2')
+        for state in states:
+            assert parallel_agent.get_action(state) == serial.get_action(state)
+    assert [key for key in parallel._pools if key[0] is PacmanAgent] == [(PacmanAgent, 2)]
@@ -0,0 +1,53 @@
+"""
+The tutorial's fruit price catalog (no framework needed).
+"""
+
+import doctest
+import math
+
+import pacman_states  # noqa: F401 (puts the tutorial directory on sys.path)
+import priceCatalog
+from buyLotsOfFruit import buyLotsOfFruit, buyLotsOfFruits
+from priceCatalog import PriceCatalog
+
+SHOPS = ['shop1', 'shop2']
+PRICES = [{'apples': 2.0, 'oranges': 1.0}, {'apples': 1.0, 'oranges': 5.0, 'limes': 3.0}]
+
+
+def test_module_doctest():
+    assert doctest.testmod(priceCatalog).failed == 0
+
+
+def test_orders_are_priced_at_every_shop():
+    quote = PriceCatalog(SHOPS, PRICES).quoteOrders([
+        [('apples', 1.0), ('oranges', 3.0)],
+        [('apples', 3.0)],
+        [('apples', 1.0), ('apples', 2.0)],
+        []])
+    assert quote.costs.tolist() == [[5.0, 16.0], [6.0, 3.0], [6.0, 3.0], [0.0, 0.0]]
+    assert quote.bestShops.tolist() == [0, 1, 1, 0]
+    assert quote.missing == []
+
+
+def test_a_fruit_sold_by_one_shop_rules_out_the_others():
+    quote = PriceCatalog(SHOPS, PRICES).quoteOrders([[('limes', 1.0)]])
+    assert math.isinf(quote.costs[0, 0]) and quote.costs[0, 1] == 3.0
+    assert quote.bestShops.tolist() == [1]
+
+
+def test_a_fruit_sold_by_no_shop_rules_out_every_shop():
+    quote = PriceCatalog(SHOPS, PRICES).quoteOrders([
+        [('pears', 1.0)],
+        [('apples', 1.0), ('kiwis', 2.0)],
+        [('apples', 1.0)]])
+    assert quote.bestShops.tolist() == [-1, -1, 1]
+    assert all(math.isinf(cost) for row in quote.costs[:2].tolist() for cost in row)
+    assert quote.missing == [(0, 'pears'), (1, 'kiwis')]
+
+
+def test_buy_lots_of_fruit():
+    assert buyLotsOfFruit([('apples', 2.0), ('pears', 3.0), ('limes', 4.0)]) == 12.25
+    assert buyLotsOfFruit([('apples', 1.0), ('kiwis', 2.0)]) is None
+    costs, missing = buyLotsOfFruits([[('apples', 1.0)], [('kiwis', 2.0)]])
+    assert costs[0] == 2.0 and math.isinf(costs[1])
+    assert missing == [(1, 'kiwis')]
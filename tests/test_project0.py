@@ -0,0 +1,162 @@
+"""
+The Project 0 planners against a plain breadth-first search over the
+framework's generatePacmanSuccessor, written like bfs.py was before it
+searched a FoodSearchProblem.
+"""
+
+from argparse import Namespace
+from collections import deque
+
+import pytest
+
+from pacman_states import initial_state, require_framework
+
+# Several dots, dead ends and a loop, small enough for the reference search
+FOOD_MAZE = """
+%%%%%%%%%%
+%P.  %  .%
+% %% % % %
+%.   .   %
+%%%% %%%.%
+%.       %
+%%%%%%%%%%
+"""
+
+# Open rooms with one dot, searched from both ends by `bidirectional`
+ONE_DOT_ROOMS = [
+    """
+%%%%%%%
+%P    %
+%     %
+%    .%
+%%%%%%%
+""",
+    """
+%%%%%%%%
+%P     %
+%      %
+%      %
+%     .%
+%%%%%%%%
+""",
+    """
+%%%%%%%%%
+%P %    %
+%  %    %
+%     % %
+%  %  %.%
+%%%%%%%%%
+""",
+]
+
+
+def reference_length(state):
+    """
+    Number of moves of a shortest plan that eats all the food, found by a
+    breadth-first search over game states.
+    """
+    from pacman_module.pacman import Directions
+
+    def key(state):
+        return state.getPacmanPosition(), tuple(state.getFood().asList())
+
+    fringe = deque([(state, 0)])
+    closed = {key(state)}
+    while fringe:
+        state, length = fringe.popleft()
+        if state.isWin():
+            return length
+        for action in state.getLegalActions(0):
+            if action == Directions.STOP:
+                continue
+            child = state.generatePacmanSuccessor(action)
+            if key(child) not in closed:
+                closed.add(key(child))
+                fringe.append((child, length + 1))
+    return None
+
+
+def play(state, actions):
+    for action in actions:
+        state = state.generatePacmanSuccessor(action)
+    return state
+
+
+def make_agent(search):
+    if search == 'bfs':
+        from bfs import PacmanAgent
+        return PacmanAgent(Namespace())
+    from astar import PacmanAgent
+    return PacmanAgent(Namespace(search=search))
+
+
+SEARCHES = ['bfs', 'astar', 'idastar', 'bidirectional']
+
+
+@pytest.mark.parametrize('search', SEARCHES)
+@pytest.mark.parametrize('text', [FOOD_MAZE] + ONE_DOT_ROOMS,
+                         ids=['maze'] + ['room{}'.format(i) for i in range(len(ONE_DOT_ROOMS))])
+def test_plans_are_shortest(search, text):
+    require_framework()
+    state = initial_state(text)
+    agent = make_agent(search)
+    agent.reset(state)
+    actions = agent.plan(state)
+    assert play(state, actions).isWin()
+    assert len(actions) == reference_length(state)
+
+
+def test_plan_cache_returns_the_rest_of_a_stored_plan():
+    require_framework()
+    from searchproblem import FoodSearchProblem, PlanCache
+    state = initial_state(FOOD_MAZE)
+    actions = make_agent('astar').astar(state)
+    cache = PlanCache()
+    cache.store(FoodSearchProblem(state), actions)
+
+    for offset in range(len(actions) + 1):
+        problem = FoodSearchProblem(play(state, actions[:offset]))
+        assert cache.lookup(problem) == tuple(actions[offset:])
+
+    # A state off the stored path is a miss
+    assert cache.lookup(FoodSearchProblem(play(state, actions[1:2]))) is None
+    cache.clear()
+    assert cache.lookup(FoodSearchProblem(state)) is None
+
+
+def test_agent_reuses_the_plan_after_replanning_mid_path():
+    require_framework()
+    from tools.instrumentation import instrument
+    state = initial_state(FOOD_MAZE)
+    agent = make_agent('astar')
+    agent.reset(state)
+    actions = agent.astar(state)
+    instrumentation = instrument(agent)
+    assert agent.get_action(state) == actions[0]
+
+    # Forgetting the queued moves mid-path replans from the cache
+    agent.moves.clear()
+    assert agent.get_action(play(state, actions[:1])) == actions[1]
+    instrumentation.close()
+    assert instrumentation.totals.cache_hits == 1
+
+
+def test_bidirectional_meets_on_the_shortest_path():
+    # Of the cells of a new layer that the other tree holds, the one with
+    # the shortest path through it is the meeting cell, not the first one
+    require_framework()
+    from searchproblem import FoodSearchProblem
+    state = initial_state("""
+%%%%%%%
+%P   .%
+%%%%%%%
+""")
+    agent = make_agent('bidirectional')
+    problem = FoodSearchProblem(state)
+    west, middle, east = (problem.cell((x, 1)) for x in (2, 3, 4))
+    tree = {middle: (None, None, 0)}
+    # East is generated before west, and is deeper in the other tree
+    other_tree = {east: (None, None, 5), west: (None, None, 2)}
+    next_layer, meeting = agent._expand_layer(problem, [middle], tree, other_tree, False)
+    assert sorted(next_layer) == sorted([west, east])
+    assert meeting == west
@@ -0,0 +1,78 @@
+"""
+The search core against a plain recursion over the framework's
+generatePacmanSuccessors/generateGhostSuccessors, written like the agents
+were before they shared searchcore.SearchAgent.
+"""
+
+import pytest
+
+from pacman_states import TWO_GHOSTS, played_states, require_framework
+
+
+def reference_value(state, plies, agent_index, chance):
+    """
+    Value of `state` searched `plies` plies deep, ghosts playing min
+    (or uniformly at random when `chance`).
+    """
+    if plies == 0 or state.isWin() or state.isLose():
+        return state.getScore()
+    next_agent = (agent_index + 1) % state.getNumAgents()
+    if agent_index == 0:
+        successors = state.generatePacmanSuccessors()
+    else:
+        successors = state.generateGhostSuccessors(agent_index)
+    if not successors:
+        return state.getScore()
+    values = [reference_value(child, plies - 1, next_agent, chance)
+              for child, _ in successors]
+    if agent_index == 0:
+        return max(values)
+    if chance:
+        return sum(values) / len(values)
+    return min(values)
+
+
+def reference_moves(state, plies, chance):
+    return {action: reference_value(child, plies - 1, 1, chance)
+            for child, action in state.generatePacmanSuccessors()}
+
+
+@pytest.mark.parametrize('module, depth', [
+    ('minimax', 1), ('minimax', 2), ('hminimax', 2), ('hminimax', 3),
+    ('expectimax', 2), ('expectimax', 3)])
+def test_moves_match_the_plain_recursion(module, depth):
+    require_framework()
+    agent = __import__(module).PacmanAgent(str(depth))
+    for seed in range(2):
+        for state in played_states(agent.get_action, 15, seed, TWO_GHOSTS):
+            agents = state.getNumAgents()
+            # minimax keeps its old depth (the last ghost layer is left out)
+            plies = (depth + 1) * agents - 1 if module == 'minimax' else depth * agents
+            values = reference_moves(state, plies, chance=module == 'expectimax')
+            action = agent.get_action(state)
+            assert action in values
+            assert values[action] == pytest.approx(max(values.values()), abs=1e-9)
+            if module == 'minimax':
+                # no move ordering: the first best successor is kept
+                first = next(a for a, v in values.items() if v == max(values.values()))
+                assert action == first
+
+
+@pytest.mark.parametrize('module', ['minimax', 'hminimax', 'expectimax'])
+def test_nodes_are_expanded_through_the_framework(module, monkeypatch):
+    # the framework counts Expanded Nodes in generate*Successors
+    require_framework()
+    from pacman_module.pacman import GameState
+    from tools.instrumentation import SearchStats
+    calls = []
+    for name in ('generatePacmanSuccessors', 'generateGhostSuccessors'):
+        generate = getattr(GameState, name)
+        monkeypatch.setattr(GameState, name,
+                            lambda self, *args, generate=generate:
+                            calls.append(1) or generate(self, *args))
+
+    agent = __import__(module).PacmanAgent('2')
+    agent.stats = SearchStats()
+    played_states(agent.get_action, 5, 0, TWO_GHOSTS)
+    assert agent.stats.expanded > 0
+    assert len(calls) == agent.stats.expanded
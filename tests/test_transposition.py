@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from pacman_states import initial_state, played_states, require_framework
+
+
+def test_successor_hash_matches_full_hash():
+    require_framework()
+    from transposition import ZobristHasher
+    hasher = ZobristHasher()
+    rng = random.Random(1)
+    for _ in range(20):
+        state = initial_state()
+        state_hash = hasher.hash_state(state)
+        while not (state.isWin() or state.isLose()):
+            for index in range(state.getNumAgents()):
+                if state.isWin() or state.isLose():
+                    break
+                child = state.generateSuccessor(index, rng.choice(state.getLegalActions(index)))
+                state_hash = hasher.successor_hash(state_hash, state, child, index)
+                state = child
+                assert state_hash == hasher.hash_state(state)
+
+
+def root_child_values(agent, state):
+    agent.start_search(state)
+    return [agent.get_value(child, 1, -float('inf'), float('inf'),
+                            features=agent.root_features(child))[0]
+            for child, _ in state.generatePacmanSuccessors()]
+
+
+def assert_warm_table_gives_fresh_values(make_agent, seeds=3, moves=20):
+    warm = make_agent()
+    for seed in range(seeds):
+        for state in played_states(warm.get_action, moves, seed=seed):
+            fresh = root_child_values(make_agent(), state)
+            assert root_child_values(warm, state) == pytest.approx(fresh)
+
+
+def test_warm_table_gives_fresh_values():
+    # States that differ only in scared timers or ghost headings (ghosts
+    # cannot reverse) must not share table entries
+    require_framework()
+    import expectimax
+    assert_warm_table_gives_fresh_values(lambda: expectimax.PacmanAgent('3'))
+
+
+def test_warm_table_with_an_evaluator_that_scales_the_score():
+    # eval - score depends on the score itself, so values cannot be stored
+    # relative to the score
+    require_framework()
+    import hminimax
+    from evaluation import FeatureEvaluator
+    weights = (2.0, -1.5, -20.0, 10.0, 0.5, -20.0)
+    assert_warm_table_gives_fresh_values(
+        lambda: hminimax.PacmanAgent('3', eval_fn=FeatureEvaluator(weights=weights)),
+        seeds=2)
+
+
+def test_warm_table_with_a_plain_evaluation_function():
+    require_framework()
+    import hminimax
+
+    def doubled_score(state):
+        return 2 * state.getScore() - state.getNumFood()
+
+    assert_warm_table_gives_fresh_values(
+        lambda: hminimax.PacmanAgent('3', eval_fn=doubled_score), seeds=2)
+
+
+def test_same_position_reached_with_a_lower_score():
+    # Pacman walks away and back: the same hashed state with a lower score
+    require_framework()
+    import hminimax
+
+    def doubled_score(state):
+        return 2 * state.getScore() - state.getNumFood()
+
+    start = initial_state('%%%%%%%\n%P  . %\n%%%%%%%')
+    back = start.generateSuccessor(0, 'East').generateSuccessor(0, 'West')
+    assert back.getScore() != start.getScore()
+
+    warm = hminimax.PacmanAgent('3', eval_fn=doubled_score)
+    root_child_values(warm, start)
+    fresh = root_child_values(hminimax.PacmanAgent('3', eval_fn=doubled_score), back)
+    assert root_child_values(warm, back) == pytest.approx(fresh)
+
+
+def test_ghost_heading_is_part_of_the_state():
+    # The same positions with the ghost heading towards or away from Pacman
+    # (ghosts cannot reverse in the course framework)
+    require_framework()
+    import hminimax
+    away = initial_state('%%%%%%%%%%%\n%P G     .%\n%%%%%%%%%%%')
+    towards = initial_state('%%%%%%%%%%%\n%P   G   .%\n%%%%%%%%%%%')
+    away = away.generateSuccessor(0, 'East').generateSuccessor(1, 'East')
+    towards = towards.generateSuccessor(0, 'East').generateSuccessor(1, 'West')
+    assert away.getGhostPositions() == towards.getGhostPositions()
+    if away.getGhostState(1).getDirection() == towards.getGhostState(1).getDirection():
+        pytest.skip('the framework does not track ghost headings')
+
+    warm = hminimax.PacmanAgent('3')
+    fresh = root_child_values(hminimax.PacmanAgent('3'), towards)
+    assert root_child_values(warm, away) != pytest.approx(fresh)
+    assert root_child_values(warm, towards) == pytest.approx(fresh)
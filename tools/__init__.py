@@ -0,0 +1,3 @@
+"""
+Tools shared by the projects: instrumentation, benchmarks and batch runs.
+"""
@@ -0,0 +1,189 @@
+"""
+Headless batch runner that plays many seeded games of one agent in a
+process pool and streams one JSON line per finished game.
+
+    python -m tools.batchrun --agent alphabeta --layouts mediumClassic,smallClassic \\
+        --games 10000 --depth 3 --ghost random --workers 8 --out games.jsonl
+
+Game `i` is played on layout `layouts[i % len(layouts)]` with seed
+`seed + i`. `random`, `numpy.random` and the random streams of the belief
+agent are reseeded before every game.
+
+Each worker process builds the agents once and reuses them for every game
+it plays, calling their `reset(state)` hook between games when they have
+one. Layout tables and transition caches stay warm, while plans, plan
+caches and transposition tables are cleared, so a game's result does not
+depend on which worker played it or what that worker played before. Nothing is drawn. Only a few games per worker are
+submitted at a time, and each result is written as soon as its game
+finishes (in completion order, tagged with its game index), so memory
+stays flat however many games are run. A summary goes to stderr.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+
+from tools.benchmark import AGENTS, REPO_ROOT, _list, _make_agents, _make_ghosts, play_game
+from tools.instrumentation import JsonLinesSink, SearchStats
+
+# Games submitted to the pool per worker before waiting for results
+GAMES_IN_FLIGHT = 4
+
+# State of each worker process, set by `_init_worker`
+_settings = None
+_agents = None
+_layouts = {}
+
+
+def _init_worker(settings):
+    """
+    Puts the agent's project directory on sys.path and builds the agents
+    that this worker reuses for all of its games.
+    """
+    global _settings, _agents
+    sys.path.insert(0, os.path.join(settings['repo'], AGENTS[settings['agent']][0]))
+    sys.path.insert(0, settings['repo'])
+    _settings = settings
+    _agents = _make_agents(settings)
+
+
+def _get_layout(name):
+    # One layout object per name, so agents that key their caches on the
+    # walls object keep them from one game to the next
+    layout = _layouts.get(name)
+    if layout is None:
+        layout = importlib.import_module('pacman_module.layout').getLayout(name)
+        if layout is None:
+            raise ValueError("Unknown layout '{}'".format(name))
+        _layouts[name] = layout
+    return layout
+
+
+def play(game, layout_name, seed):
+    """
+    Plays game number `game` on this worker and returns its result.
+    """
+    pacman, belief_agent = _agents
+    random.seed(seed)
+    try:
+        import numpy
+        numpy.random.seed(seed)
+    except ImportError:
+        pass
+
+    layout = _get_layout(layout_name)
+    ghosts = _make_ghosts(_settings['ghost'], layout)
+    GameState = importlib.import_module('pacman_module.pacman').GameState
+    state = GameState()
+    state.initialize(layout, len(ghosts))
+
+    reset = getattr(pacman, 'reset', None)
+    if reset is not None:
+        reset(state)
+    if belief_agent is not None:
+        belief_agent.reset(state, seed)
+
+    stats = pacman.stats = SearchStats()
+    start = time.perf_counter()
+    state, moves = play_game(state, pacman, belief_agent, ghosts, _settings['max_moves'])
+    seconds = time.perf_counter() - start
+    pacman.stats = None
+
+    return {
+        'game': game,
+        'layout': layout_name,
+        'seed': seed,
+        'moves': moves,
+        'score': state.getScore(),
+        'win': state.isWin(),
+        'seconds': seconds,
+        'nodes': stats.expanded,
+        'worker': os.getpid(),
+    }
+
+
+def run_batch(settings, layouts, games, seed, workers, write):
+    """
+    Plays `games` games over `workers` processes and calls `write(result)`
+    for each game as it finishes. Returns the number of games played.
+    """
+    jobs = ((game, layouts[game % len(layouts)], seed + game) for game in range(games))
+    played = 0
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'),
+                             initializer=_init_worker, initargs=(settings,)) as executor:
+        pending = set()
+        for job in jobs:
+            pending.add(executor.submit(play, *job))
+            if len(pending) >= workers * GAMES_IN_FLIGHT:
+                break
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                write(future.result())
+                played += 1
+                job = next(jobs, None)
+                if job is not None:
+                    pending.add(executor.submit(play, *job))
+    return played
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--agent', required=True, choices=list(AGENTS))
+    parser.add_argument('--layouts', type=_list(str), required=True)
+    parser.add_argument('--games', type=int, default=100)
+    parser.add_argument('--depth', type=int, default=2)
+    parser.add_argument('--ghost', default='random')
+    parser.add_argument('--seed', type=int, default=0, help='seed of game 0 (game i uses seed + i)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max-moves', type=int, default=1000)
+    parser.add_argument('--sensor-variance', type=float, default=1.0)
+    parser.add_argument('--repo', default=REPO_ROOT)
+    parser.add_argument('--out', help='append results to this JSON-lines file (default: stdout)')
+    args = parser.parse_args(argv)
+
+    _, uses_depth, uses_ghosts = AGENTS[args.agent]
+    settings = {
+        'agent': args.agent,
+        'depth': args.depth if uses_depth else None,
+        'ghost': args.ghost if uses_ghosts else None,
+        'seed': args.seed,
+        'sensor_variance': args.sensor_variance,
+        'max_moves': args.max_moves,
+        'repo': args.repo,
+    }
+
+    sink = JsonLinesSink(args.out) if args.out else None
+    totals = {'wins': 0, 'score': 0.0}
+
+    def write(result):
+        totals['wins'] += result['win']
+        totals['score'] += result['score']
+        if sink is not None:
+            sink.write(result)
+        else:
+            print(json.dumps(result), flush=True)
+
+    start = time.perf_counter()
+    try:
+        played = run_batch(settings, args.layouts, args.games, args.seed, args.workers, write)
+    finally:
+        if sink is not None:
+            sink.close()
+    seconds = time.perf_counter() - start
+
+    if played:
+        print('{} games in {:.1f}s ({:.2f} games/s): win rate {:.1%}, mean score {:.1f}'.format(
+            played, seconds, played / seconds, totals['wins'] / played,
+            totals['score'] / played), file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""
+Headless benchmark of every agent over a matrix of layouts, depths, ghost
+types and seeds.
+
+Each run plays one seeded game without graphics in a fresh process, with
+the project directory of the agent on `sys.path` so that its own
+`pacman_module` is used. It records moves/second, nodes/second, per-move
+latency percentiles, peak RSS and the final score. Results are written
+as CSV and/or JSON, and can be compared against a stored baseline:
+
+    python -m tools.benchmark --agents astar,alphabeta \\
+        --layouts mediumClassic --depths 2,3 --ghosts random --seeds 0,1 \\
+        --json results.json --baseline baseline.json
+
+Games are driven through the layout/GameState/ghost-agent API of the
+course framework: `pacman_module.layout.getLayout(name)`,
+`GameState.initialize(layout, num_ghosts)` and the ghost classes of
+`pacman_module.ghostAgents`. A ghost type `random` means the class
+`RandomGhost`.
+"""
+
+import argparse
+import csv
+import importlib
+import itertools
+import json
+import math
+import os
+import random
+import resource
+import sys
+from argparse import Namespace
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Agent name -> (project directory, uses depth, uses ghosts)
+AGENTS = {
+    'bfs': ('Project 0', False, False),
+    'astar': ('Project 0', False, False),
+    'minimax': ('Project 1', True, True),
+    'alphabeta': ('Project 1', True, True),
+    'expectimax': ('Project 1', True, True),
+    'belief': ('project 2', False, True),
+}
+
+# Metrics compared against the baseline, and whether higher is better
+COMPARED_METRICS = {
+    'moves_per_second': True,
+    'nodes_per_second': True,
+    'latency_p50': False,
+    'latency_p90': False,
+    'peak_rss_kb': False,
+}
+
+COLUMNS = ('agent', 'layout', 'depth', 'ghost', 'seed', 'moves', 'score', 'win',
+           'seconds', 'moves_per_second', 'nodes', 'nodes_per_second',
+           'latency_p50', 'latency_p90', 'latency_p99', 'latency_max', 'peak_rss_kb')
+
+
+def ghost_class_name(ghost):
+    """
+    Returns the ghost-agent class name for a ghost type (`random` -> `RandomGhost`).
+    """
+    if ghost[0].isupper():
+        return ghost
+    return ghost.capitalize() + 'Ghost'
+
+
+def percentile(values, fraction):
+    """
+    Returns the `fraction` percentile of `values` (nearest rank: the
+    smallest value with at least `fraction` of the values at or below it).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Rounded first so that e.g. 0.7 * 10 = 7.000000000000001 gives rank 7
+    rank = math.ceil(round(fraction * len(ordered), 9))
+    return ordered[min(len(ordered) - 1, max(0, rank - 1))]
+
+
+def _make_agents(config):
+    """
+    Builds the Pacman agent and, for the belief agent, the belief-state
+    agent of a run. Must be called with the project directory on sys.path.
+    """
+    name = config['agent']
+    depth = str(config['depth'])
+    if name == 'bfs':
+        return importlib.import_module('bfs').PacmanAgent(Namespace()), None
+    if name == 'astar':
+        return importlib.import_module('astar').PacmanAgent(Namespace(search='astar')), None
+    if name == 'minimax':
+        return importlib.import_module('minimax').PacmanAgent(depth), None
+    if name == 'alphabeta':
+        return importlib.import_module('hminimax').PacmanAgent(depth), None
+    if name == 'expectimax':
+        return importlib.import_module('expectimax').PacmanAgent(depth), None
+    if name == 'belief':
+        args = Namespace(ghostagent=config['ghost'], sensorvariance=config['sensor_variance'],
+                         seed=config['seed'])
+        pacman = importlib.import_module('pacmanagent').PacmanAgent(args)
+        return pacman, importlib.import_module('bayesfilter').BeliefStateAgent(args)
+    raise ValueError("Unknown agent '{}'".format(name))
+
+
+def _agent_action(agent, state):
+    get_action = getattr(agent, 'get_action', None) or agent.getAction
+    return get_action(state)
+
+
+def _make_ghosts(ghost, layout):
+    """
+    Builds one ghost agent of type `ghost` per ghost of `layout` (none when
+    `ghost` is None).
+    """
+    if ghost is None:
+        return []
+    ghost_module = importlib.import_module('pacman_module.ghostAgents')
+    ghost_class = getattr(ghost_module, ghost_class_name(ghost))
+    return [ghost_class(index) for index in range(1, layout.getNumGhosts() + 1)]
+
+
+def play_game(state, pacman, belief_agent, ghosts, max_moves):
+    """
+    Plays a game from `state` until it ends or Pacman made `max_moves`
+    moves, without any display. Returns the final state and the number
+    of Pacman moves.
+    """
+    moves = 0
+    while not (state.isWin() or state.isLose()) and moves < max_moves:
+        if belief_agent is not None:
+            beliefs, _ = belief_agent.get_action(state)
+            action = pacman.get_action(state, beliefs)
+        else:
+            action = pacman.get_action(state)
+        state = state.generateSuccessor(0, action)
+        moves += 1
+
+        for index, ghost in enumerate(ghosts, 1):
+            if state.isWin() or state.isLose():
+                break
+            state = state.generateSuccessor(index, _agent_action(ghost, state))
+    return state, moves
+
+
+def run_game(config):
+    """
+    Plays one headless game described by `config` and returns its metrics.
+    Runs in a fresh worker process.
+    """
+    project_dir = os.path.join(config['repo'], AGENTS[config['agent']][0])
+    sys.path.insert(0, project_dir)
+    sys.path.insert(0, config['repo'])
+    from tools.instrumentation import instrument
+
+    random.seed(config['seed'])
+    try:
+        import numpy
+        numpy.random.seed(config['seed'])
+    except ImportError:
+        pass
+
+    layout_module = importlib.import_module('pacman_module.layout')
+    GameState = importlib.import_module('pacman_module.pacman').GameState
+    layout = layout_module.getLayout(config['layout'])
+    if layout is None:
+        raise ValueError("Unknown layout '{}'".format(config['layout']))
+
+    pacman, belief_agent = _make_agents(config)
+    ghosts = _make_ghosts(config['ghost'], layout)
+
+    state = GameState()
+    state.initialize(layout, len(ghosts))
+
+    # The belief agent's filter update is the part worth timing in project 2
+    timed = belief_agent if belief_agent is not None else pacman
+    # Only the totals and latencies are read, so per-call records are not kept
+    instrumentation = instrument(timed, name=config['agent'], keep_records=False)
+
+    state, moves = play_game(state, pacman, belief_agent, ghosts, config['max_moves'])
+
+    summary = instrumentation.summary()
+    latencies = instrumentation.latencies
+    instrumentation.close()
+
+    seconds = summary['seconds']
+    result = {key: config[key] for key in ('agent', 'layout', 'depth', 'ghost', 'seed')}
+    result.update({
+        'moves': moves,
+        'score': state.getScore(),
+        'win': state.isWin(),
+        'seconds': seconds,
+        'moves_per_second': moves / seconds if seconds else 0.0,
+        'nodes': summary['expanded'],
+        'nodes_per_second': summary['expanded'] / seconds if seconds else 0.0,
+        'latency_p50': percentile(latencies.sample, 0.50),
+        'latency_p90': percentile(latencies.sample, 0.90),
+        'latency_p99': percentile(latencies.sample, 0.99),
+        'latency_max': latencies.max,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    })
+    return result
+
+
+def build_matrix(args):
+    """
+    Returns one run config per combination, skipping depths and ghost
+    types for agents that do not use them.
+    """
+    configs = []
+    seen = set()
+    for agent, layout, depth, ghost, seed in itertools.product(
+            args.agents, args.layouts, args.depths, args.ghosts, args.seeds):
+        _, uses_depth, uses_ghosts = AGENTS[agent]
+        config = {
+            'agent': agent,
+            'layout': layout,
+            'depth': depth if uses_depth else None,
+            'ghost': ghost if uses_ghosts else None,
+            'seed': seed,
+        }
+        key = run_key(config)
+        if key in seen:
+            continue
+        seen.add(key)
+        config.update(repo=args.repo, max_moves=args.max_moves,
+                      sensor_variance=args.sensor_variance)
+        configs.append(config)
+    return configs
+
+
+def run_key(result):
+    return '{agent}|{layout}|{depth}|{ghost}|{seed}'.format(**result)
+
+
+def run_matrix(configs):
+    """
+    Runs every config one after another, each in a new process, so that
+    timings do not interfere and peak RSS is measured per run.
+    """
+    results = []
+    context = get_context('spawn')
+    for config in configs:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.append(executor.submit(run_game, config).result())
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    Compares `results` with a baseline (a list of results) and returns the
+    list of regressions beyond `tolerance` (a fraction).
+    """
+    previous = {run_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(run_key(result))
+        if old is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            before, after = old[metric], result[metric]
+            if not before:
+                continue
+            change = (after - before) / before
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append({'run': run_key(result), 'metric': metric,
+                                    'baseline': before, 'value': after, 'change': change})
+    return regressions
+
+
+def write_csv(results, path):
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        for result in results:
+            writer.writerow({column: result[column] for column in COLUMNS})
+
+
+def _list(cast):
+    return lambda text: [cast(item) for item in text.split(',') if item]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--agents', type=_list(str), default=list(AGENTS))
+    parser.add_argument('--layouts', type=_list(str), required=True)
+    parser.add_argument('--depths', type=_list(int), default=[2])
+    parser.add_argument('--ghosts', type=_list(str), default=['random'])
+    parser.add_argument('--seeds', type=_list(int), default=[0])
+    parser.add_argument('--max-moves', type=int, default=1000)
+    parser.add_argument('--sensor-variance', type=float, default=1.0)
+    parser.add_argument('--repo', default=REPO_ROOT)
+    parser.add_argument('--csv', help='write results as CSV')
+    parser.add_argument('--json', help='write results (and regressions) as JSON')
+    parser.add_argument('--baseline', help='JSON results to compare against')
+    parser.add_argument('--save-baseline', help='store these results as a baseline')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='relative change allowed before a regression is reported')
+    args = parser.parse_args(argv)
+
+    for agent in args.agents:
+        if agent not in AGENTS:
+            parser.error("unknown agent '{}' (choose from {})".format(agent, ', '.join(AGENTS)))
+
+    results = run_matrix(build_matrix(args))
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)['results'], args.tolerance)
+
+    if args.csv:
+        write_csv(results, args.csv)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'results': results, 'regressions': regressions}, file, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump({'results': results}, file, indent=2)
+
+    for result in results:
+        print('{:<40} score={:<8} moves/s={:<10.1f} nodes/s={:<10.1f} p50={:.4f}s rss={}kB'.format(
+            run_key(result), result['score'], result['moves_per_second'],
+            result['nodes_per_second'], result['latency_p50'], result['peak_rss_kb']))
+    for regression in regressions:
+        print('REGRESSION {run} {metric}: {baseline:.4g} -> {value:.4g} ({change:+.1%})'.format(
+            **regression))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
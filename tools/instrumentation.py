@@ -0,0 +1,204 @@
+"""
+Opt-in search instrumentation for every agent in the repository.
+
+Agents carry a `stats` attribute that is None by default and bump
+counters on it only when it is set, so an agent that was never
+instrumented pays one attribute check per node at most. `instrument(agent)` switches it on for
+one agent: it gives the agent its own SearchStats, wraps `get_action` with
+a timer and writes one JSON line per call. cProfile and tracemalloc can
+be added around the search.
+"""
+
+import cProfile
+import json
+import random
+import time
+import tracemalloc
+
+# Latencies kept per Instrumentation for percentiles (see LatencyReservoir)
+LATENCY_SAMPLE_SIZE = 4096
+
+
+class SearchStats:
+    """
+    Counters that agents update while searching.
+
+    - `expanded`: nodes whose successors were generated
+    - `generated`: successor nodes created
+    - `cutoffs`: alpha-beta (or Star1) prunings
+    - `tt_hits`: transposition-table probes that ended a node early
+    - `cache_hits`: plans served from a plan cache
+    - `peak_frontier`: largest number of nodes held by the search
+    """
+    __slots__ = ('expanded', 'generated', 'cutoffs', 'tt_hits', 'cache_hits', 'peak_frontier')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class LatencyReservoir:
+    """
+    Fixed-size uniform sample of the call latencies (reservoir sampling),
+    so that memory stays flat however many calls are recorded.
+
+    `sample` holds every latency until `size` calls, and a uniform random
+    subset of them afterwards. `count` and `max` are exact.
+    """
+
+    def __init__(self, size=LATENCY_SAMPLE_SIZE, seed=0):
+        self.size = size
+        self.sample = []
+        self.count = 0
+        self.max = 0.0
+        # Own stream, so sampling neither uses nor disturbs the game's seeds
+        self.random = random.Random(seed)
+
+    def add(self, seconds):
+        self.count += 1
+        self.max = max(self.max, seconds)
+        if len(self.sample) < self.size:
+            self.sample.append(seconds)
+        else:
+            index = self.random.randrange(self.count)
+            if index < self.size:
+                self.sample[index] = seconds
+
+    def __len__(self):
+        return self.count
+
+
+class JsonLinesSink:
+    """
+    Appends one JSON object per line to a file.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, 'a')
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class Instrumentation:
+    """
+    Per-agent recorder created by `instrument`.
+
+    `totals` accumulates the counters and time of every call, and
+    `latencies` is a LatencyReservoir of the call times. Per-call records
+    go to `sink`, or to the `records` list when `keep_records` is set and
+    no sink is given; otherwise they are dropped, so memory stays bounded
+    however many calls are made.
+    """
+
+    def __init__(self, agent, name, sink=None, profile_path=None, trace_memory=False,
+                 keep_records=False):
+        self.agent = agent
+        self.name = name
+        self.sink = sink
+        self.records = [] if keep_records and sink is None else None
+        self.calls = 0
+        self.totals = SearchStats()
+        self.total_seconds = 0.0
+        self.latencies = LatencyReservoir()
+
+        self.profile_path = profile_path
+        self.profiler = cProfile.Profile() if profile_path else None
+        self.trace_memory = trace_memory
+        # Only tracing started here is stopped by close(); a caller that
+        # was already tracing keeps its trace
+        self.started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+
+        self._get_action = agent.get_action
+        agent.stats = SearchStats()
+        agent.get_action = self.get_action
+
+    def get_action(self, *args, **kwargs):
+        stats = self.agent.stats
+        stats.reset()
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        if self.profiler is not None:
+            self.profiler.enable()
+
+        start = time.perf_counter()
+        try:
+            return self._get_action(*args, **kwargs)
+        finally:
+            seconds = time.perf_counter() - start
+            if self.profiler is not None:
+                self.profiler.disable()
+            self._record(stats, seconds)
+
+    def _record(self, stats, seconds):
+        self.calls += 1
+        self.total_seconds += seconds
+        self.latencies.add(seconds)
+        for name in SearchStats.__slots__:
+            value = getattr(stats, name)
+            if name == 'peak_frontier':
+                self.totals.peak_frontier = max(self.totals.peak_frontier, value)
+            else:
+                setattr(self.totals, name, getattr(self.totals, name) + value)
+        if self.sink is None and self.records is None:
+            return
+
+        record = {'agent': self.name, 'call': self.calls, 'seconds': seconds}
+        record.update(stats.as_dict())
+        if self.trace_memory:
+            record['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+
+        if self.sink is not None:
+            self.sink.write(record)
+        else:
+            self.records.append(record)
+
+    def summary(self):
+        """
+        Returns the totals over every call as a dict.
+        """
+        summary = {'agent': self.name, 'calls': self.calls, 'seconds': self.total_seconds}
+        summary.update(self.totals.as_dict())
+        return summary
+
+    def close(self):
+        """
+        Restores the agent, writes the profile, if any, and stops tracemalloc
+        if this instrumentation started it.
+        """
+        self.agent.get_action = self._get_action
+        self.agent.stats = None
+        if self.profiler is not None:
+            self.profiler.dump_stats(self.profile_path)
+        if self.sink is not None:
+            self.sink.close()
+        if self.started_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def instrument(agent, name=None, trace_path=None, profile_path=None, trace_memory=False,
+               keep_records=False):
+    """
+    Switches on instrumentation for `agent` and returns its Instrumentation.
+
+    - `trace_path`: JSON-lines file that receives one record per call
+    - `profile_path`: run cProfile around every call and dump it there
+    - `trace_memory`: record the tracemalloc peak of every call
+    - `keep_records`: keep the per-call records in memory when there is
+      no `trace_path`
+    """
+    sink = JsonLinesSink(trace_path) if trace_path else None
+    return Instrumentation(agent, name or type(agent).__module__, sink, profile_path,
+                           trace_memory, keep_records)
@@ -14,10 +14,14 @@ the script should produce the output:
 Cost of [('apples', 2.0), ('pears', 3.0), ('limes', 4.0)] is 12.25
 """
 from __future__ import print_function
+from priceCatalog import PriceCatalog
 
 fruitPrices = {'apples': 2.00, 'oranges': 1.50, 'pears': 1.75,
                'limes': 0.75, 'strawberries': 1.00}
 
+# fruitPrices as a one-shop catalog, for pricing many orders at once
+fruitCatalog = PriceCatalog(['fruitPrices'], [fruitPrices])
+
 
 def buyLotsOfFruit(orderList):
     """
@@ -25,19 +29,30 @@ def buyLotsOfFruit(orderList):
 
     Returns cost of order
     """
-    totalCost = 0.0
     "*** YOUR CODE HERE ***"
-    for fruit, numPounds in orderList:
-        if fruit in fruitPrices:
-            totalCost += numPounds * fruitPrices[fruit]
-        else:
-            print(f"Error: {fruit} is not in the price list.")
-            return None
-    return totalCost
+    costs, missing = buyLotsOfFruits([orderList])
+    if missing:
+        return None
+    return float(costs[0])
+
+
+def buyLotsOfFruits(orderLists):
+    """
+        orderLists: List of orders, each a list of (fruit, numPounds) tuples
+
+    Returns (costs, missing): the cost of every order as a NumPy array, and
+    the (order index, fruit) of every line whose fruit is not in fruitPrices
+    (orders with such a line cost inf)
+    """
+    quote = fruitCatalog.quoteOrders(orderLists)
+    return quote.costs[:, 0], quote.missing
 
 
 # Main Method
 if __name__ == '__main__':
     "This code runs when you invoke the script from the command line"
     orderList = [('apples', 2.0), ('pears', 3.0), ('limes', 4.0)]
-    print('Cost of', orderList, 'is', buyLotsOfFruit(orderList))
\ No newline at end of file
+    print('Cost of', orderList, 'is', buyLotsOfFruit(orderList))
+    costs, missing = buyLotsOfFruits([orderList, [('apples', 1.0), ('kiwis', 2.0)]])
+    for orderIndex, fruit in missing:
+        print('Order', orderIndex, ':', fruit, 'is not in the price list')
\ No newline at end of file
@@ -0,0 +1,130 @@
+# priceCatalog.py
+# ---------------
+
+
+"""
+A compiled price catalog for pricing many fruit orders at many shops at once.
+
+The catalog stores a fruit-by-shop price matrix as a NumPy array (NaN where
+a shop does not sell a fruit) and a fruit-name-to-row mapping. A batch of
+orders is encoded as a sparse order-by-fruit matrix of pounds, so the cost
+of every order at every shop is one sparse-by-dense matrix product, and the
+best shop of every order is the argmin of its row.
+
+  >>> catalog = PriceCatalog(['shop1', 'shop2'],
+  ...                        [{'apples': 2.0, 'oranges': 1.0},
+  ...                         {'apples': 1.0, 'oranges': 5.0}])
+  >>> quote = catalog.quoteOrders([[('apples', 1.0), ('oranges', 3.0)],
+  ...                              [('apples', 3.0), ('kiwis', 1.0)]])
+  >>> quote.costs.tolist(), quote.bestShops.tolist(), quote.missing
+  ([[5.0, 16.0], [inf, inf]], [0, -1], [(1, 'kiwis')])
+"""
+from __future__ import print_function
+from collections import namedtuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# costs[i, j]: cost of order i at shop j (inf when shop j does not sell one
+#              of the fruits of order i)
+# bestShops[i]: column of the cheapest shop for order i (-1 if no shop can
+#               fill it)
+# missing: (order index, fruit) for every order line whose fruit is not in
+#          the catalog; no shop sells it, so these orders cost inf everywhere
+Quote = namedtuple('Quote', ['costs', 'bestShops', 'missing'])
+
+
+class PriceCatalog:
+    """
+    Fruit-by-shop price matrix with a fruit name to row index mapping.
+    """
+
+    def __init__(self, shopNames, priceLists):
+        """
+            shopNames: List of shop names (one column each)
+            priceLists: List of {fruit: price per pound} dicts, one per shop
+        """
+        self.shopNames = list(shopNames)
+        fruits = sorted(set(fruit for prices in priceLists for fruit in prices))
+        self.fruitIndex = dict((fruit, row) for row, fruit in enumerate(fruits))
+        self.prices = np.full((len(fruits), len(self.shopNames)), np.nan)
+        for column, prices in enumerate(priceLists):
+            for fruit, price in prices.items():
+                self.prices[self.fruitIndex[fruit], column] = price
+
+    @classmethod
+    def fromShops(cls, fruitShops):
+        """
+        Builds the catalog of a list of shop.FruitShop objects
+        """
+        return cls([fruitShop.getName() for fruitShop in fruitShops],
+                   [fruitShop.fruitPrices for fruitShop in fruitShops])
+
+    def encodeLines(self, orderIds, fruits, pounds, numOrders):
+        """
+        Encodes order lines, given as three parallel sequences (order index,
+        fruit name, pounds), as a sparse [numOrders, numFruits] matrix.
+
+        Names are looked up once per distinct fruit, not once per line.
+        Returns (quantities, missing) as described in Quote.
+        """
+        orderIds = np.asarray(orderIds, dtype=np.intp)
+        pounds = np.asarray(pounds, dtype=float)
+        names, inverse = np.unique(np.asarray(fruits, dtype=str), return_inverse=True)
+        rows = np.array([self.fruitIndex.get(name, -1) for name in names.tolist()],
+                        dtype=np.intp)
+        inverse = inverse.reshape(-1)
+        fruitIds = rows[inverse]
+
+        known = fruitIds >= 0
+        missing = [(int(orderId), str(names[name]))
+                   for orderId, name in zip(orderIds[~known], inverse[~known])]
+
+        # Lines of zero pounds are dropped so that they never meet a NaN price,
+        # and repeated fruits in one order are summed by the CSR constructor
+        keep = known & (pounds != 0)
+        quantities = csr_matrix((pounds[keep], (orderIds[keep], fruitIds[keep])),
+                                shape=(numOrders, len(self.fruitIndex)))
+        return quantities, missing
+
+    def encodeOrders(self, orders):
+        """
+            orders: List of orders, each a list of (fruit, numPounds) tuples
+
+        Returns (quantities, missing) as in encodeLines
+        """
+        orderIds, fruits, pounds = [], [], []
+        for orderId, orderList in enumerate(orders):
+            for fruit, numPounds in orderList:
+                orderIds.append(orderId)
+                fruits.append(fruit)
+                pounds.append(numPounds)
+        return self.encodeLines(orderIds, fruits, pounds, len(orders))
+
+    def quoteQuantities(self, quantities):
+        """
+        Returns (costs, bestShops) of encoded orders
+        """
+        # A NaN price only reaches the orders that contain that fruit
+        costs = np.asarray(quantities @ self.prices)
+        costs[np.isnan(costs)] = np.inf
+        if costs.shape[1] == 0:
+            return costs, np.full(costs.shape[0], -1, dtype=np.intp)
+        bestShops = np.argmin(costs, axis=1)
+        bestShops[np.isinf(costs[np.arange(len(costs)), bestShops])] = -1
+        return costs, bestShops
+
+    def quoteOrders(self, orders):
+        """
+            orders: List of orders, each a list of (fruit, numPounds) tuples
+
+        Returns the Quote of every order at every shop
+        """
+        quantities, missing = self.encodeOrders(orders)
+        costs, bestShops = self.quoteQuantities(quantities)
+        # The missing lines are left out of the quantities, but no shop sells
+        # their fruit, so no shop can fill those orders
+        unfilled = np.array([orderId for orderId, _ in missing], dtype=np.intp)
+        costs[unfilled] = np.inf
+        bestShops[unfilled] = -1
+        return Quote(costs, bestShops, missing)
@@ -12,6 +12,7 @@ For orders:  [('apples', 3.0)] best shop is shop2
 """
 from __future__ import print_function
 import shop
+from priceCatalog import PriceCatalog
 
 
 def shopSmart(orderList, fruitShops):
@@ -20,14 +21,20 @@ def shopSmart(orderList, fruitShops):
         fruitShops: List of FruitShops
     """
     "*** YOUR CODE HERE ***"
-    min_price = float('inf')
-    best_shop = None
-    for fruit_shop in fruitShops:
-        current_price = fruit_shop.getPriceOfOrder(orderList)
-        if current_price < min_price:
-            min_price = current_price
-            best_shop = fruit_shop
-    return best_shop
+    return shopSmartOrders([orderList], fruitShops)[0]
+
+
+def shopSmartOrders(orderLists, fruitShops):
+    """
+        orderLists: List of orders, each a list of (fruit, numPound) tuples
+        fruitShops: List of FruitShops
+
+    Returns the cheapest FruitShop for every order (None when no shop sells
+    all of its fruits), pricing all orders at all shops in one matrix product
+    """
+    quote = PriceCatalog.fromShops(fruitShops).quoteOrders(orderLists)
+    return [fruitShops[column] if column >= 0 else None
+            for column in quote.bestShops.tolist()]
 
 
 if __name__ == '__main__':